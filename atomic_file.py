@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import contextlib
+import os
+import shutil
+import threading
+from typing import IO, Iterator
+
+
+@contextlib.contextmanager
+def atomic_write(
+    path: str, /, mode: str = 'wb', *, keep_mode: bool = False, **kwargs
+) -> Iterator[IO]:
+    # Opens (with `open(..., mode=mode, **kwargs)`) a temp file next to `path`,
+    # which is renamed over `path` when the block exits normally, and removed
+    # when it raises.  A reader of `path` sees either the old file or the new
+    # one, never a partial file.  With `keep_mode`, the permission bits of an
+    # existing `path` are kept.
+    temp_path = '{}.{}.{}.tmp'.format(path, os.getpid(), threading.get_ident())
+    try:
+        with open(temp_path, mode=mode, **kwargs) as f:
+            yield f
+        if keep_mode and os.path.exists(path):
+            shutil.copymode(path, temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temp_path)
+        raise
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# python -m tty7tyil_python.benchmark.crawler_benchmark
+
+import contextlib
+import http.server
+import tempfile
+import threading
+import time
+from typing import Dict, Iterator, Union
+
+from tty7tyil_python import crawler_requests_session as crs
+from tty7tyil_python import crawler_response_cache as crc
+from tty7tyil_python import crawler_throttle as ct
+from tty7tyil_python.benchmark import harness
+
+REQUEST_COUNT = 200
+THROTTLED_REQUEST_COUNT = 50
+BODY = b'x' * 4096
+# the throttling stub answers 429 to requests closer than this to the last one
+THROTTLING_INTERVAL = 0.02
+
+
+class Stub_Request_Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+    # send headers and body in one segment, otherwise Nagle's algorithm and
+    # delayed ACK add ~40 ms to every keep-alive request
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+class Throttling_Stub_Request_Handler(Stub_Request_Handler):
+    last_request_time = 0.0
+
+    def do_GET(self):
+        now = time.monotonic()
+        throttled = now - Throttling_Stub_Request_Handler.last_request_time < THROTTLING_INTERVAL
+        Throttling_Stub_Request_Handler.last_request_time = now
+        if throttled:
+            self.send_response(429)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        else:
+            super().do_GET()
+
+
+@contextlib.contextmanager
+def stub_server(handler=Stub_Request_Handler) -> Iterator[str]:
+    # gives the base url of a local http server, running in a daemon thread
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield 'http://127.0.0.1:{}/'.format(server.server_port)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def run() -> Dict[str, Dict[str, Union[int, float]]]:
+    result_dict = dict()
+    with stub_server() as base_url:
+        result_dict['crawler.session_construction'] = harness.measure(
+            lambda: crs.Crawler_Requests_Session(), number=1000
+        )
+        session = crs.Crawler_Requests_Session(sleep_interval_range=(0.0, 0.0))
+        result_dict['crawler.get.x{}'.format(REQUEST_COUNT)] = harness.measure(
+            lambda: [session.get(base_url + str(i)) for i in range(REQUEST_COUNT)], repeat=3
+        )
+        pooled_session = crs.Crawler_Requests_Session(
+            sleep_interval_range=(0.0, 0.0), identity_pool_size=4
+        )
+
+        def get_rotating():
+            for i in range(REQUEST_COUNT):
+                pooled_session.get(base_url + str(i))
+                pooled_session.refresh_identity()
+
+        result_dict['crawler.get_rotating_pooled.x{}'.format(REQUEST_COUNT)] = harness.measure(
+            get_rotating, repeat=3
+        )
+
+        with tempfile.TemporaryDirectory() as cache_directory:
+            # the stub sends no cache headers, every entry stays fresh by default
+            cached_session = crs.Crawler_Requests_Session(
+                sleep_interval_range=(0.0, 0.0),
+                response_cache=crc.Response_Cache(cache_directory, default_freshness=3600.0),
+            )
+            result_dict['crawler.get_cached.x{}'.format(REQUEST_COUNT)] = harness.measure(
+                lambda: [cached_session.get(base_url + str(i)) for i in range(REQUEST_COUNT)],
+                repeat=3,
+            )
+
+    with stub_server(Throttling_Stub_Request_Handler) as base_url:
+
+        def get_throttled(session):
+            # until the stub answered `THROTTLED_REQUEST_COUNT` times with 200
+            done = 0
+            while done < THROTTLED_REQUEST_COUNT:
+                done += session.get(base_url).status_code == 200
+
+        throttle = ct.Adaptive_Throttle(initial_delay=0.1)
+        result_dict['crawler.get_adaptive_throttled.x{}'.format(THROTTLED_REQUEST_COUNT)] = (
+            harness.measure(
+                lambda: get_throttled(crs.Crawler_Requests_Session(throttle=throttle)), repeat=3
+            )
+        )
+        result_dict['crawler.get_fixed_sleep_throttled.x{}'.format(THROTTLED_REQUEST_COUNT)] = (
+            harness.measure(
+                lambda: get_throttled(
+                    crs.Crawler_Requests_Session(sleep_interval_range=(0.05, 0.15))
+                ),
+                repeat=3,
+            )
+        )
+    return result_dict
+
+
+if __name__ == '__main__':
+    for name, result in run().items():
+        print(harness.format_result(name, result))
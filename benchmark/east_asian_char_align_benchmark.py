@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# python -m tty7tyil_python.benchmark.east_asian_char_align_benchmark
+
+import io
+import random
+from typing import Dict, List, Union
+
+from tty7tyil_python.benchmark import harness
+from tty7tyil_python.string_et_output import east_asian_char_align as eaca
+from tty7tyil_python.string_et_output import table_layout as tl
+
+STRING_COUNT = 10_000
+TABLE_COLUMN_COUNT = 5
+SEED = 0
+
+CHAR_POOL_DICT = {
+    'ascii': 'abcdefghijklmnopqrstuvwxyz ABCDEFGHIJKLMNOPQRSTUVWXYZ 0123456789 .,-_',
+    'cjk': '中文表格日志格式化标题段落测试宽度字符全角，。「」ｱｲｳ한국어',
+    'mixed': 'abc def 123 中文表格 ±×÷°§ é ü',
+}
+
+
+def gen_string_list(char_pool: str, count: int = STRING_COUNT, seed: int = SEED) -> List[str]:
+    rng = random.Random(seed)
+    return [''.join(rng.choices(char_pool, k=rng.randint(4, 40))) for _ in range(count)]
+
+
+def run() -> Dict[str, Dict[str, Union[int, float]]]:
+    result_dict = dict()
+    for name, char_pool in CHAR_POOL_DICT.items():
+        string_list = gen_string_list(char_pool)
+        result_dict['count_visual_length.{}'.format(name)] = harness.measure(
+            lambda: [eaca.count_visual_length(s) for s in string_list]
+        )
+        result_dict['count_visual_length.{}.ambiguous_always_wide'.format(name)] = harness.measure(
+            lambda: [eaca.count_visual_length(s, True) for s in string_list]
+        )
+        result_dict['count_visual_lengths.{}'.format(name)] = harness.measure(
+            lambda: eaca.count_visual_lengths(string_list)
+        )
+
+        row_list = [
+            string_list[i:i + TABLE_COLUMN_COUNT]
+            for i in range(0, len(string_list), TABLE_COLUMN_COUNT)
+        ]
+
+        def align_cell_by_cell():
+            # what `write_table` replaces: every cell measured twice
+            width_list = [
+                max(eaca.count_visual_length(row[i]) for row in row_list)
+                for i in range(TABLE_COLUMN_COUNT)
+            ]
+            stream = io.StringIO()
+            for row in row_list:
+                stream.write(
+                    ' '.join(eaca.align_to_width(c, ' ', '<', w) for c, w in zip(row, width_list))
+                    + '\n'
+                )
+
+        result_dict['align_to_width.table.{}'.format(name)] = harness.measure(align_cell_by_cell)
+        result_dict['table_layout.write_table.{}'.format(name)] = harness.measure(
+            lambda: tl.write_table(row_list, io.StringIO().write)
+        )
+        result_dict['table_layout.write_table_streaming.{}'.format(name)] = harness.measure(
+            lambda: tl.write_table_streaming(
+                row_list, io.StringIO().write, [40] * TABLE_COLUMN_COUNT
+            )
+        )
+    return result_dict
+
+
+if __name__ == '__main__':
+    for name, result in run().items():
+        print(harness.format_result(name, result))
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import statistics
+import timeit
+from typing import Callable, Dict, Union
+
+
+def measure(
+    func: Callable[[], object], /, *, repeat: int = 5, number: int = 1
+) -> Dict[str, Union[int, float]]:
+    # seconds per call
+    time_list = [t / number for t in timeit.Timer(func).repeat(repeat=repeat, number=number)]
+    return {
+        'min': min(time_list),
+        'median': statistics.median(time_list),
+        'repeat': repeat,
+        'number': number,
+    }
+
+
+def format_result(name: str, result: Dict[str, Union[int, float]]) -> str:
+    return '{:<48} min {:>12.6f} s    median {:>12.6f} s'.format(
+        name, result['min'], result['median']
+    )
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# python -m tty7tyil_python.benchmark.id_library_benchmark
+
+import os
+import tempfile
+from typing import Dict, Union
+
+from tty7tyil_python import id_library as il
+from tty7tyil_python.benchmark import harness
+
+POWER = 16
+SAMPLE_COUNT = 10_000
+TAKE_COUNT = 1_000
+SEED = 0
+
+
+def run() -> Dict[str, Dict[str, Union[int, float]]]:
+    result_dict = dict()
+    result_dict['id_library.populate.power_{}'.format(POWER)] = harness.measure(
+        lambda: il.ID_Library().populate(POWER, show_progress=False, seed=SEED), repeat=3
+    )
+    result_dict['id_library.populate_max_entropy.{}'.format(2 ** POWER)] = harness.measure(
+        lambda: il.ID_Library().populate_max_entropy(2 ** POWER, seed=SEED), repeat=3
+    )
+
+    library = il.ID_Library()
+    library.populate(POWER, show_progress=False, seed=SEED)
+    result_dict['id_library.len8.x{}'.format(SAMPLE_COUNT)] = harness.measure(
+        lambda: [library.len8() for _ in range(SAMPLE_COUNT)]
+    )
+    # a pool can only be taken from once, so it is built inside the timing
+    result_dict['id_library.pool_build_and_take.x{}'.format(TAKE_COUNT)] = harness.measure(
+        lambda: [p.take() for p in [library.pool('len8')] for _ in range(TAKE_COUNT)]
+    )
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'pool.bin')
+        result_dict['id_library.save'] = harness.measure(lambda: library.save(path))
+        result_dict['id_library.load'] = harness.measure(lambda: il.ID_Library.load(path))
+        loaded = il.ID_Library.load(path)
+        result_dict['id_library.loaded_len8.x{}'.format(SAMPLE_COUNT)] = harness.measure(
+            lambda: [loaded.len8() for _ in range(SAMPLE_COUNT)]
+        )
+    return result_dict
+
+
+if __name__ == '__main__':
+    for name, result in run().items():
+        print(harness.format_result(name, result))
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# python -m tty7tyil_python.benchmark.markdown_benchmark
+
+import datetime as dt
+import os
+import random
+import tempfile
+from typing import Dict, Union
+
+from tty7tyil_python.benchmark import harness
+from tty7tyil_python.markdown import md_content_operator as mdco
+from tty7tyil_python.markdown import md_corpus_index as mdci
+from tty7tyil_python.markdown import md_structure_data as mdsd
+
+SECTION_COUNT = 2_000
+FILE_COUNT = 200
+SEED = 0
+
+
+def gen_md_file_content(section_count: int = SECTION_COUNT, seed: int = SEED) -> str:
+    rng = random.Random(seed)
+    line_list = [
+        mdsd.MD_Structure_Data.FILE_HEADER_BEGIN_COMMENT,
+        'create time: 1970-01-01 00:00:00 Z',
+        'modify time: 2000-01-01 00:00:00 Z',
+        'tags: benchmark, markdown, 中文',
+        'note:',
+        mdsd.MD_Structure_Data.FILE_HEADER_END_COMMENT,
+        '',
+        '# Benchmark Document',
+        '',
+    ]
+    level = 2
+    for i in range(section_count):
+        level = min(6, max(2, level + rng.choice((-1, 0, 1))))
+        line_list.extend(
+            (
+                '{} Section {} 标题 {}'.format('#' * level, i % 50, rng.choice(('A', 'B', 'C'))),
+                '',
+                'Lorem ipsum dolor sit amet, 中文段落 text.',
+                '',
+                '```python',
+                '# not a header',
+                '```',
+                '',
+            )
+        )
+    return '\n'.join(line_list)
+
+
+def run() -> Dict[str, Dict[str, Union[int, float]]]:
+    md_file_content = gen_md_file_content()
+    result_dict = dict()
+    result_dict['markdown.md_structure_data.parse'] = harness.measure(
+        lambda: mdsd.MD_Structure_Data(md_file_content)
+    )
+    result_dict['markdown.md_structure_data.extract_file_header'] = harness.measure(
+        lambda: mdsd.MD_Structure_Data.extract_file_header(md_file_content), number=100
+    )
+    result_dict['markdown.gen_md_toc'] = harness.measure(
+        lambda: mdco.gen_md_toc(md_file_content, include_begin_end_comment=True)
+    )
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'single.md')
+
+        def write_single():
+            with open(path, mode='wt', encoding='utf-8', newline='\n') as f:
+                f.write(md_file_content)
+            mdco.write_toc_to_md_file(path)
+
+        result_dict['markdown.write_toc_to_md_file'] = harness.measure(write_single)
+
+        doc_dir = os.path.join(temp_dir, 'docs')
+        os.mkdir(doc_dir)
+        for i in range(FILE_COUNT):
+            with open(os.path.join(doc_dir, '{}.md'.format(i)), mode='wt', encoding='utf-8') as f:
+                f.write(gen_md_file_content(20, seed=i))
+        cache_path = os.path.join(temp_dir, 'toc_cache.json')
+        result_dict['markdown.write_toc_to_md_files.cold'] = harness.measure(
+            lambda: mdco.write_toc_to_md_files(doc_dir, cache_path=cache_path), repeat=1
+        )
+        result_dict['markdown.write_toc_to_md_files.warm'] = harness.measure(
+            lambda: mdco.write_toc_to_md_files(doc_dir, cache_path=cache_path)
+        )
+
+        index_path = os.path.join(temp_dir, 'corpus_index.json')
+        result_dict['markdown.md_corpus_index.update.cold'] = harness.measure(
+            lambda: mdci.MD_Corpus_Index(doc_dir, index_path=index_path).update(), repeat=1
+        )
+        result_dict['markdown.md_corpus_index.update.warm'] = harness.measure(
+            lambda: mdci.MD_Corpus_Index(doc_dir, index_path=index_path).update()
+        )
+        index = mdci.MD_Corpus_Index(doc_dir, index_path=index_path)
+        after = dt.datetime(1999, 1, 1, tzinfo=dt.timezone.utc)
+        result_dict['markdown.md_corpus_index.files_modified_after'] = harness.measure(
+            lambda: index.files_modified_after('modify time', after), number=1000
+        )
+        result_dict['markdown.md_corpus_index.has_link_target'] = harness.measure(
+            lambda: index.has_link_target('1.md#benchmark-document', source='0.md'),
+            number=1000,
+        )
+    return result_dict
+
+
+if __name__ == '__main__':
+    for name, result in run().items():
+        print(harness.format_result(name, result))
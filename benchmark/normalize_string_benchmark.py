@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# python -m tty7tyil_python.benchmark.normalize_string_benchmark
+
+import random
+import re
+from typing import Callable, Dict, List, Sequence, Union
+
+from tty7tyil_python.benchmark import harness
+from tty7tyil_python.string_et_output import normalize_string as ns
+
+STRING_COUNT = 10_000
+SEED = 0
+
+
+def legacy_normalize_string(
+    raw_string: str,
+    /,
+    style: ns.NORMALIZATION_STYLE = ns.NORMALIZATION_STYLE.MARKDOWN,
+    case_converter: Callable[[str], str] = str.lower,
+    *,
+    valid_char: Sequence[str] = ns.MD_ANCHOR_VALID_CHAR,
+) -> str:
+    # the per call setup `normalize_string` used to do, kept as the baseline
+    if style in (ns.NORMALIZATION_STYLE.MARKDOWN, ns.NORMALIZATION_STYLE.HYPHEN):
+        string = raw_string.replace(' ', '-')
+    elif style is ns.NORMALIZATION_STYLE.UNDERSCORE:
+        string = raw_string.replace(' ', '_')
+    elif style is ns.NORMALIZATION_STYLE.DOT:
+        string = raw_string.replace(' ', '.')
+    else:
+        string = raw_string
+    if (style is not ns.NORMALIZATION_STYLE.MARKDOWN) and (r'\.' not in valid_char):
+        valid_char = list(valid_char)
+        valid_char.append(r'\.')
+    regex_char_to_remove = re.compile(r'[^{}]'.format(''.join(valid_char)), flags=re.ASCII)
+    string = regex_char_to_remove.sub('', string)
+    return case_converter(string)
+
+
+def gen_header_list(count: int = STRING_COUNT, seed: int = SEED) -> List[str]:
+    rng = random.Random(seed)
+    word_list = ('Table', 'of', 'Contents', 'API', 'v2.0', 'FAQ?', '(draft)', '中文', '标题', '--')
+    return [' '.join(rng.choices(word_list, k=rng.randint(1, 6))) for _ in range(count)]
+
+
+def run() -> Dict[str, Dict[str, Union[int, float]]]:
+    header_list = gen_header_list()
+    result_dict = dict()
+    for style in (ns.NORMALIZATION_STYLE.MARKDOWN, ns.NORMALIZATION_STYLE.UNDERSCORE):
+        name = 'normalize_string.{}'.format(style.name.lower())
+        normalizer = ns.get_normalizer(style)
+        result_dict['{}.legacy_per_call'.format(name)] = harness.measure(
+            lambda: [legacy_normalize_string(s, style) for s in header_list]
+        )
+        result_dict['{}.normalize_string'.format(name)] = harness.measure(
+            lambda: [ns.normalize_string(s, style) for s in header_list]
+        )
+        result_dict['{}.get_normalizer'.format(name)] = harness.measure(
+            lambda: [normalizer(s) for s in header_list]
+        )
+        result_dict['{}.normalize_many'.format(name)] = harness.measure(
+            lambda: ns.normalize_many(header_list, style)
+        )
+    for result in result_dict.values():
+        result['per_call'] = result['min'] / STRING_COUNT
+    return result_dict
+
+
+if __name__ == '__main__':
+    for name, result in run().items():
+        print(
+            '{}    per call {:>8.3f} us'.format(
+                harness.format_result(name, result), result['per_call'] * 1e6
+            )
+        )
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Runs every benchmark (offline, fixed seeds, synthetic inputs) and writes the
+# results as JSON, so that two runs can be compared:
+#
+#     python -m tty7tyil_python.benchmark.run -o result.json [-k markdown ...]
+
+import argparse
+import datetime as dt
+import importlib
+import json
+import platform
+import sys
+from typing import Dict, List, Optional, Union
+
+from tty7tyil_python.benchmark import harness
+
+BENCHMARK_MODULE_LIST = (
+    'id_library_benchmark',
+    'markdown_benchmark',
+    'toc_tree_benchmark',
+    'tree_benchmark',
+    'normalize_string_benchmark',
+    'east_asian_char_align_benchmark',
+    'crawler_benchmark',
+)
+
+
+def run(
+    module_name_list: Optional[List[str]] = None,
+) -> Dict[str, Dict[str, Union[int, float]]]:
+    result_dict = dict()
+    for module_name in BENCHMARK_MODULE_LIST:
+        if (module_name_list is not None) and (module_name not in module_name_list):
+            continue
+        module = importlib.import_module('tty7tyil_python.benchmark.{}'.format(module_name))
+        for name, result in module.run().items():
+            print(harness.format_result(name, result), file=sys.stderr)
+            result_dict[name] = result
+    return result_dict
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-o', '--output', default='-', help="JSON file, '-' for stdout")
+    parser.add_argument(
+        '-k', '--module', action='append', choices=BENCHMARK_MODULE_LIST, dest='module_list'
+    )
+    args = parser.parse_args()
+
+    report = {
+        'time': dt.datetime.now(dt.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'results': run(args.module_list),
+    }
+    if args.output == '-':
+        json.dump(report, sys.stdout, indent=4)
+        print()
+    else:
+        with open(args.output, mode='wt', encoding='utf-8') as f:
+            json.dump(report, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
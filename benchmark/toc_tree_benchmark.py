@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# python -m tty7tyil_python.benchmark.toc_tree_benchmark
+
+import random
+from typing import Dict, List, Union
+
+from tty7tyil_python.benchmark import harness
+from tty7tyil_python.markdown import md_structure_data as mdsd
+
+HEADER_COUNT = 100_000
+SEED = 0
+
+
+def gen_md_file_content(level_list: List[int]) -> str:
+    return ''.join(
+        '{} header {}\n\nsome text\n\n'.format('#' * level, i)
+        for i, level in enumerate(level_list)
+    )
+
+
+def gen_level_list(shape: str, count: int = HEADER_COUNT, seed: int = SEED) -> List[int]:
+    rng = random.Random(seed)
+    if shape == 'flat':
+        return [2] * count
+    elif shape == 'deep':
+        # 1, 2, ..., 6, 6, 6, ... (one long chain of nested sections)
+        return [min(i + 1, 6) for i in range(count)]
+    elif shape == 'sawtooth':
+        return [i % 6 + 1 for i in range(count)]
+    elif shape == 'random_walk':
+        level_list = [1]
+        for _ in range(count - 1):
+            level_list.append(min(6, max(1, level_list[-1] + rng.choice((-2, -1, 0, 1, 1)))))
+        return level_list
+    raise ValueError('unknown shape: {}'.format(shape))
+
+
+def run() -> Dict[str, Dict[str, Union[int, float]]]:
+    result_dict = dict()
+    for shape in ('flat', 'deep', 'sawtooth', 'random_walk'):
+        md_file_content = gen_md_file_content(gen_level_list(shape))
+        result_dict['toc_tree.extract_toc.{}'.format(shape)] = harness.measure(
+            lambda: mdsd.MD_Structure_Data.extract_toc(md_file_content), repeat=3
+        )
+    return result_dict
+
+
+if __name__ == '__main__':
+    for name, result in run().items():
+        print(harness.format_result(name, result))
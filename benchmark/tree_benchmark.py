@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# python -m tty7tyil_python.benchmark.tree_benchmark
+
+import io
+from typing import Dict, Union
+
+from tty7tyil_python import tree
+from tty7tyil_python.benchmark import harness
+
+WIDE_COUNT = 100_000
+DEEP_COUNT = 5_000
+
+
+def gen_wide_tree(count: int = WIDE_COUNT) -> tree.Tree[int]:
+    return tree.Tree(0, [tree.Tree(i) for i in range(1, count + 1)])
+
+
+def gen_deep_tree(count: int = DEEP_COUNT) -> tree.Tree[int]:
+    root = node = tree.Tree(0)
+    for i in range(1, count + 1):
+        node.branches.append(branch := tree.Tree(i))
+        node = branch
+    return root
+
+
+def run() -> Dict[str, Dict[str, Union[int, float]]]:
+    result_dict = dict()
+    for shape, t in (('wide', gen_wide_tree()), ('deep', gen_deep_tree())):
+        result_dict['tree.format_as_string.{}'.format(shape)] = harness.measure(
+            lambda: tree.Tree.format_as_string(t)
+        )
+        result_dict['tree.write_formatted.{}'.format(shape)] = harness.measure(
+            lambda: tree.Tree.write_formatted(t, io.StringIO())
+        )
+        compact_tree = tree.Compact_Tree.from_tree(t)
+        result_dict['tree.compact_tree.preorder.{}'.format(shape)] = harness.measure(
+            lambda: sum(1 for _ in compact_tree.preorder())
+        )
+    return result_dict
+
+
+if __name__ == '__main__':
+    for name, result in run().items():
+        print(harness.format_result(name, result))
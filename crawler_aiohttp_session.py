@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import random
+import urllib.parse
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from tty7tyil_python import user_agent_source as uas
+
+
+class Crawler_Aiohttp_Session(object):
+    # Asynchronous counterpart of `Crawler_Requests_Session`.  The politeness
+    # delay drawn from `sleep_interval_range` is kept between two requests to
+    # the same host (`host:port`), requests to different hosts do not wait for
+    # each other and share one pooled connector.
+    #
+    #     async def fetch(session, url):
+    #         async with session.get(url) as response:
+    #             return await response.text()
+    #
+    #     async with Crawler_Aiohttp_Session() as session:
+    #         text_list = await asyncio.gather(*(fetch(session, u) for u in url_list))
+    def __init__(
+        self,
+        /,
+        user_agent: str = '',
+        *,
+        proxies_list: List[Dict[str, str]] = [{'http': '', 'https': ''}],
+        sleep_interval_range: Tuple[float, float] = (0.5, 2.0),
+        connection_limit: int = 100,
+        connection_limit_per_host: int = 0,
+        user_agent_source=None,
+    ):
+        self.__user_agent_source = user_agent_source
+        self.__user_agent = user_agent
+        self._proxies_list = proxies_list
+        self._sleep_interval_range = sleep_interval_range
+        self._connection_limit = connection_limit
+        self._connection_limit_per_host = connection_limit_per_host
+        self.__session: Optional[aiohttp.ClientSession] = None
+        self.__host_lock_dict: Dict[str, asyncio.Lock] = dict()
+        self.__host_next_time_dict: Dict[str, float] = dict()
+        self.__headers: Optional[Dict[str, str]] = None  # set on first request
+        self.__proxies: Dict[str, str] = dict()
+
+    def __random_user_agent(self) -> str:
+        source = self.__user_agent_source or uas.get_user_agent_source()
+        return source.random
+
+    @property
+    def _user_agent(self) -> str:
+        if self.__user_agent == '':
+            self.__user_agent = self.__random_user_agent()
+        return self.__user_agent
+
+    def refresh_identity(self, refresh_user_agent: bool = True):
+        # unlike the blocking session, the connection pool is kept
+        if refresh_user_agent:
+            self.__headers = {'User-Agent': self.__random_user_agent()}
+        else:
+            self.__headers = {'User-Agent': self._user_agent}
+        self.__proxies = random.choice(self._proxies_list)
+
+    async def __aenter__(self) -> Crawler_Aiohttp_Session:
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self.__session is not None:
+            await self.__session.close()
+            self.__session = None
+
+    def __get_session(self) -> aiohttp.ClientSession:
+        # created lazily, it has to be done inside the running event loop
+        if self.__session is None:
+            self.__session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self._connection_limit,
+                    limit_per_host=self._connection_limit_per_host,
+                ),
+            )
+        return self.__session
+
+    async def __wait_politely(self, host: str):
+        lock = self.__host_lock_dict.setdefault(host, asyncio.Lock())
+        async with lock:
+            loop = asyncio.get_running_loop()
+            delay = self.__host_next_time_dict.get(host, 0.0) - loop.time()
+            if 0 < delay:
+                await asyncio.sleep(delay)
+            self.__host_next_time_dict[host] = (
+                loop.time() + random.uniform(*self._sleep_interval_range)
+            )
+
+    @contextlib.asynccontextmanager
+    async def get(self, url: str, **kwargs) -> AsyncIterator[aiohttp.ClientResponse]:
+        # like `aiohttp.ClientSession.get`, the body has to be read inside the
+        # `async with` block, the connection goes back to the pool after it
+        if self.__headers is None:
+            self.refresh_identity()
+        split_url = urllib.parse.urlsplit(url)
+        headers = dict(self.__headers)
+        headers.update(kwargs.pop('headers', None) or {})
+        kwargs.setdefault('proxy', self.__proxies.get(split_url.scheme) or None)
+        await self.__wait_politely(split_url.netloc)
+        async with self.__get_session().get(url, headers=headers, **kwargs) as response:
+            yield response
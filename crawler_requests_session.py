@@ -1,15 +1,41 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import concurrent.futures
+import os
 import random
+import re
+import threading
 import time
-from typing import Dict, List, Tuple
+import urllib.parse
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
-import fake_useragent as fua
 import requests
 
+from tty7tyil_python import crawler_response_cache as crc
+from tty7tyil_python import crawler_throttle as ct
+from tty7tyil_python import user_agent_source as uas
+
 
 class Crawler_Requests_Session(object):
+    # With `identity_pool_size` > 1, that many sessions (identities) are kept,
+    # each with its own user agent, proxy and keep-alive connections.
+    # `refresh_identity` then switches to another identity from the pool
+    # (`identity_rotation` is 'random' or 'round_robin') instead of rebuilding
+    # the session, and an identity whose request raises or answers with one of
+    # `retire_status_codes` is retired and replaced in the background.
+    #
+    # Nothing is built on construction: the user agent source (shared by the
+    # process unless `user_agent_source` is given) and the identities are only
+    # set up on first use.
+    #
+    # With a `response_cache` (a `crawler_response_cache.Response_Cache`),
+    # `get` answers from disk while a stored response is fresh, without the
+    # politeness sleep, and revalidates it with a conditional request after.
+    #
+    # With a `throttle` (a `crawler_throttle.Adaptive_Throttle`), the delay
+    # before a request adapts to the answers of its host, instead of being
+    # drawn from `sleep_interval_range`.
     def __init__(
         self,
         /,
@@ -17,21 +43,275 @@ class Crawler_Requests_Session(object):
         *,
         proxies_list: List[Dict[str, str]] = [{'http': '', 'https': ''}],
         sleep_interval_range: Tuple[float, float] = (0.5, 2.0),
+        identity_pool_size: int = 1,
+        identity_rotation: str = 'random',
+        retire_status_codes: Tuple[int, ...] = (403, 407),
+        user_agent_source=None,
+        response_cache: Optional[crc.Response_Cache] = None,
+        throttle: Optional[ct.Adaptive_Throttle] = None,
     ):
-        self.__fua = fua.UserAgent()
-        self._user_agent = user_agent if user_agent != '' else self.__fua.random
+        if identity_rotation not in ('random', 'round_robin'):
+            raise ValueError('unknown identity rotation: {}'.format(identity_rotation))
+        self.__user_agent_source = user_agent_source
+        self.__user_agent = user_agent
         self._proxies_list = proxies_list
         self._sleep_interval_range = sleep_interval_range
-        self.refresh_identity()
+        self._identity_pool_size = max(1, identity_pool_size)
+        self._identity_rotation = identity_rotation
+        self._retire_status_codes = retire_status_codes
+        self.response_cache = response_cache
+        self.throttle = throttle
+        self.__identity_lock = threading.Lock()
+        self.__identity_list: List[requests.Session] = []
+        self.__identity_index = 0
+        self.__session: Optional[requests.Session] = None
+        # set by `refresh_identity(refresh_user_agent=False)`, sent with every
+        # request instead of the user agent of the identity
+        self.__fixed_user_agent: Optional[str] = None
+        self.__retired_stats = {'new_connections': 0, 'requests': 0}
+
+    def __random_user_agent(self) -> str:
+        source = self.__user_agent_source or uas.get_user_agent_source()
+        return source.random
+
+    @property
+    def _user_agent(self) -> str:
+        if self.__user_agent == '':
+            self.__user_agent = self.__random_user_agent()
+        return self.__user_agent
+
+    def __ensure_identities(self):
+        # must be called with `__identity_lock` held
+        if self.__session is None:
+            self.__identity_list = [
+                self.__new_identity() for _ in range(self._identity_pool_size)
+            ]
+            self.__identity_index = 0
+            self.__session = self.__identity_list[0]
+
+    def __current_identity(self) -> requests.Session:
+        if (session := self.__session) is None:
+            with self.__identity_lock:
+                self.__ensure_identities()
+                session = self.__session
+        return session
+
+    def __new_identity(self) -> requests.Session:
+        session = requests.Session()
+        session.headers.update({'User-Agent': self.__random_user_agent()})
+        session.proxies.update(random.choice(self._proxies_list))
+        return session
 
     def refresh_identity(self, refresh_user_agent: bool = True):
-        self.__session = requests.Session()
-        if refresh_user_agent:
-            self.__session.headers.update({'User-Agent': self.__fua.random})
+        with self.__identity_lock:
+            self.__ensure_identities()
+            if len(self.__identity_list) == 1:
+                # a single identity can only be refreshed by rebuilding it
+                self.__close_identity(self.__identity_list[0])
+                self.__identity_list[0] = self.__new_identity()
+                self.__identity_index = 0
+            elif self._identity_rotation == 'round_robin':
+                self.__identity_index = (self.__identity_index + 1) % len(self.__identity_list)
+            else:
+                self.__identity_index = random.choice(
+                    [i for i in range(len(self.__identity_list)) if i != self.__identity_index]
+                )
+            self.__session = self.__identity_list[self.__identity_index]
+            # the pooled identities keep their own user agents
+            self.__fixed_user_agent = None if refresh_user_agent else self._user_agent
+
+    def __close_identity(self, session: requests.Session):
+        # must be called with `__identity_lock` held
+        stats = Crawler_Requests_Session.__count_connections(session)
+        for k in self.__retired_stats:
+            self.__retired_stats[k] += stats[k]
+        session.close()
+
+    def __retire_identity(self, session: requests.Session):
+        with self.__identity_lock:
+            if session not in self.__identity_list:
+                return  # already retired by another thread
+            self.__identity_list.remove(session)
+            self.__close_identity(session)
+            if len(self.__identity_list) == 0:
+                self.__identity_list.append(self.__new_identity())
+            if self.__session is session:
+                self.__identity_index = random.randrange(len(self.__identity_list))
+                self.__session = self.__identity_list[self.__identity_index]
+            else:
+                self.__identity_index = self.__identity_list.index(self.__session)
+        threading.Thread(target=self.__replenish_identity, daemon=True).start()
+
+    def __replenish_identity(self):
+        session = self.__new_identity()
+        with self.__identity_lock:
+            if len(self.__identity_list) < self._identity_pool_size:
+                self.__identity_list.append(session)
+                return
+        session.close()
+
+    @staticmethod
+    def __count_connections(session: requests.Session) -> Dict[str, int]:
+        # Counted over the `urllib3` connection pools of the session, a pool
+        # that `urllib3` itself evicted (more than `pool_connections` hosts) is
+        # no longer counted.
+        stats = {'new_connections': 0, 'requests': 0}
+        for adapter in session.adapters.values():
+            pool_manager_list = [adapter.poolmanager, *adapter.proxy_manager.values()]
+            for pool_manager in pool_manager_list:
+                for key in pool_manager.pools.keys():
+                    if (pool := pool_manager.pools.get(key)) is not None:
+                        stats['new_connections'] += pool.num_connections
+                        stats['requests'] += pool.num_requests
+        return stats
+
+    def connection_stats(self) -> Dict[str, int]:
+        with self.__identity_lock:
+            self.__ensure_identities()
+            stats = dict(self.__retired_stats)
+            for session in self.__identity_list:
+                for k, v in Crawler_Requests_Session.__count_connections(session).items():
+                    stats[k] += v
+        stats['reused_connections'] = stats['requests'] - stats['new_connections']
+        stats['identities'] = len(self.__identity_list)
+        return stats
+
+    def get(self, url: str, params=None, **kwargs) -> requests.Response:
+        session = self.__current_identity()
+        if (fixed_user_agent := self.__fixed_user_agent) is not None:
+            kwargs['headers'] = {'User-Agent': fixed_user_agent, **(kwargs.get('headers') or {})}
+        if (self.response_cache is None) or kwargs.get('stream', False):
+            return self.__get(session, url, params=params, **kwargs)
+
+        cache = self.response_cache
+        request_headers = requests.structures.CaseInsensitiveDict(session.headers)
+        request_headers.update(kwargs.get('headers') or {})
+        prepared_request = requests.models.PreparedRequest()
+        prepared_request.prepare_url(url, params)
+        key = cache.key(prepared_request.url, request_headers)
+        if (metadata := cache.lookup(key)) is not None:
+            if metadata['fresh'] and ((response := cache.load_response(key, metadata)) is not None):
+                cache.count('hits')
+                return response
+            kwargs['headers'] = {
+                **crc.Response_Cache.conditional_headers(metadata), **(kwargs.get('headers') or {})
+            }
+
+        response = self.__get(session, url, params=params, **kwargs)
+        if (
+            (metadata is not None)
+            and (response.status_code == 304)
+            and ((cached_response := cache.load_response(key, metadata)) is not None)
+        ):
+            cache.revalidated(key, metadata, response)
+            return cached_response
+        cache.count('misses')
+        if crc.Response_Cache.is_storable(response):
+            cache.store(key, response)
+        return response
+
+    def __get(self, session: requests.Session, url: str, **kwargs) -> requests.Response:
+        if (throttle := self.throttle) is None:
+            time.sleep(random.uniform(*self._sleep_interval_range))
         else:
-            self.__session.headers.update({'User-Agent': self._user_agent})
-        self.__session.proxies.update(random.choice(self._proxies_list))
+            host = urllib.parse.urlsplit(url).netloc
+            throttle.wait(host)
+            start_time = time.monotonic()
+        try:
+            response = session.get(url, **kwargs)
+        except requests.RequestException:
+            if throttle is not None:
+                throttle.report(host, None, time.monotonic() - start_time)
+            if 1 < self._identity_pool_size:
+                self.__retire_identity(session)
+            raise
+        if throttle is not None:
+            throttle.report(
+                host,
+                response.status_code,
+                response.elapsed.total_seconds(),
+                retry_after=ct.Adaptive_Throttle.parse_retry_after(
+                    response.headers.get('Retry-After')
+                ),
+            )
+        if (1 < self._identity_pool_size) and (response.status_code in self._retire_status_codes):
+            self.__retire_identity(session)
+        return response
+
+    __REGEX_CONTENT_RANGE = re.compile(r'bytes (\d+)-(\d+)/(\d+|\*)')
+
+    def download(self, url: str, dest: str, /, *, chunk_size: int = 2**16, **kwargs) -> int:
+        # Streams the body into `dest` + '.part', which is renamed to `dest`
+        # once complete, so memory use does not depend on the size of the file.
+        # A '.part' left over by an interrupted download is resumed with a
+        # `Range` request.  Gives the size of `dest`, raises `IOError` when the
+        # body is shorter or longer than announced (the '.part' is kept).
+        part_path = dest + '.part'
+        caller_headers = {
+            k: v for k, v in (kwargs.pop('headers', None) or {}).items() if k.lower() != 'range'
+        }
+        # the length checks and the offsets are about the bytes as stored
+        caller_headers['Accept-Encoding'] = 'identity'
+        while True:
+            # at most twice: a '.part' refused with 416 is removed, the retry
+            # then has no range and a 416 for it is raised below
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            headers = dict(caller_headers)
+            if 0 < offset:
+                headers['Range'] = 'bytes={}-'.format(offset)
+            response = self.get(url, stream=True, headers=headers, **kwargs)
+            if (response.status_code != 416) or (offset == 0):
+                break
+            with response:
+                if response.headers.get('Content-Range', '') == 'bytes */{}'.format(offset):
+                    os.replace(part_path, dest)  # the '.part' was already complete
+                    return offset
+            os.remove(part_path)  # changed on the server, start over
+
+        with response:
+            content_range = response.headers.get('Content-Range', '')
+            response.raise_for_status()
 
-    def get(self, *args, **kwargs):
-        time.sleep(random.uniform(*self._sleep_interval_range))
-        return self.__session.get(*args, **kwargs)
+            if response.status_code == 206:
+                m = Crawler_Requests_Session.__REGEX_CONTENT_RANGE.fullmatch(content_range)
+                if (m is None) or (int(m.group(1)) != offset):
+                    raise IOError('unexpected content range for {}: {}'.format(url, content_range))
+                total = None if m.group(3) == '*' else int(m.group(3))
+                mode = 'ab'
+            else:
+                # the server ignored the range, the whole body is sent again
+                offset = 0
+                content_length = response.headers.get('Content-Length')
+                total = None if content_length is None else int(content_length)
+                mode = 'wb'
+
+            with open(part_path, mode=mode) as f:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    f.write(chunk)
+                size = f.tell()
+
+        if (total is not None) and (size != total):
+            raise IOError(
+                'incomplete download of {}: {} of {} bytes'.format(url, size, total)
+            )
+        os.replace(part_path, dest)
+        return size
+
+    def download_many(
+        self,
+        url_dest_iter: Iterable[Tuple[str, str]],
+        /,
+        *,
+        workers: int = 4,
+        **kwargs,
+    ) -> Dict[str, Union[int, BaseException]]:
+        # `download` of every `(url, dest)` with up to `workers` at the same
+        # time, gives the size or the raised exception for every `dest`
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            future_dict = {
+                dest: executor.submit(self.download, url, dest, **kwargs)
+                for url, dest in url_dest_iter
+            }
+        return {
+            dest: future.exception() or future.result() for dest, future in future_dict.items()
+        }
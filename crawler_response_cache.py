@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import email.utils
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import requests
+import requests.structures
+
+from tty7tyil_python import atomic_file as af
+
+# On-disk cache of `GET` responses for `Crawler_Requests_Session`, one pair of
+# files per entry in `directory`:
+#     <key>.json: url, status, reason, encoding and headers of the response,
+#                 its mtime is when the entry was stored or last revalidated
+#     <key>.gz  : the gzip compressed body, its mtime is when it was last used
+# where <key> is the sha256 of the url and of the `vary_header_names` request
+# headers.  The json file is written last, an entry without it does not exist.
+
+
+class Response_Cache(object):
+    # A stored entry is served without any request while it is fresh, that is
+    # for the `max-age` of its `Cache-Control` (or until its `Expires`), or for
+    # `default_freshness` seconds if the server gave neither.  After that it is
+    # revalidated with `If-None-Match` / `If-Modified-Since` and served from
+    # disk on `304 Not Modified`.
+    #
+    # Entries older than `max_age` seconds (since stored or revalidated) are
+    # dropped, and the least recently used ones are dropped while the bodies
+    # take more than `max_size` bytes on disk.
+    __REGEX_MAX_AGE = re.compile(r'(?:^|,)\s*max-age\s*=\s*"?(\d+)"?', flags=re.IGNORECASE)
+
+    def __init__(
+        self,
+        directory: str,
+        /,
+        *,
+        max_size: Optional[int] = 2**30,
+        max_age: Optional[float] = None,
+        default_freshness: float = 0.0,
+        vary_header_names: Tuple[str, ...] = ('Accept', 'Accept-Language', 'Authorization'),
+    ):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_size = max_size
+        self.max_age = max_age
+        self.default_freshness = default_freshness
+        self.vary_header_names = vary_header_names
+        self.__lock = threading.Lock()
+        self.__stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stored': 0, 'evicted': 0}
+        # key -> [body size, last used time, stored time], scanned on first store
+        self.__index: Optional[Dict[str, list]] = None
+        self.__total_size = 0
+
+    def key(self, url: str, request_headers: Mapping[str, str]) -> str:
+        # `request_headers` is expected to be case insensitive, like the
+        # headers of a `requests.Session`
+        digest = hashlib.sha256(url.encode('utf-8'))
+        for name in self.vary_header_names:
+            digest.update('\n{}: {}'.format(name.lower(), request_headers.get(name, '')).encode())
+        return digest.hexdigest()
+
+    def __path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key + suffix)
+
+    def count(self, name: str):
+        with self.__lock:
+            self.__stats[name] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self.__lock:
+            return dict(self.__stats)
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        # the stored metadata, with its 'stored_time' and 'fresh' added
+        try:
+            with open(self.__path(key, '.json'), mode='rt', encoding='utf-8') as f:
+                stored_time = os.fstat(f.fileno()).st_mtime
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            return None
+        now = time.time()
+        if (self.max_age is not None) and (self.max_age < now - stored_time):
+            self.__remove(key)
+            return None
+        metadata['stored_time'] = stored_time
+        metadata['fresh'] = now - stored_time < self.__freshness(metadata['headers'])
+        return metadata
+
+    def __freshness(self, headers: Mapping[str, str]) -> float:
+        headers = requests.structures.CaseInsensitiveDict(headers)
+        cache_control = headers.get('Cache-Control', '').lower()
+        if ('no-cache' in cache_control) or ('no-store' in cache_control):
+            return 0.0
+        if (m := Response_Cache.__REGEX_MAX_AGE.search(cache_control)) is not None:
+            return float(m.group(1))
+        if 'Expires' in headers:
+            try:
+                expires = email.utils.parsedate_to_datetime(headers['Expires'])
+                date = email.utils.parsedate_to_datetime(headers['Date'])
+                return (expires - date).total_seconds()
+            except (KeyError, TypeError, ValueError):
+                return 0.0  # an invalid `Expires` means already expired
+        return self.default_freshness
+
+    @staticmethod
+    def conditional_headers(metadata: Mapping[str, Any]) -> Dict[str, str]:
+        headers = requests.structures.CaseInsensitiveDict(metadata['headers'])
+        conditional_headers = dict()
+        if 'ETag' in headers:
+            conditional_headers['If-None-Match'] = headers['ETag']
+        if 'Last-Modified' in headers:
+            conditional_headers['If-Modified-Since'] = headers['Last-Modified']
+        return conditional_headers
+
+    @staticmethod
+    def is_storable(response: requests.Response) -> bool:
+        return (response.status_code == 200) and (
+            'no-store' not in response.headers.get('Cache-Control', '').lower()
+        )
+
+    def load_response(self, key: str, metadata: Mapping[str, Any]) -> Optional[requests.Response]:
+        body_path = self.__path(key, '.gz')
+        try:
+            with gzip.open(body_path, mode='rb') as f:
+                content = f.read()
+            os.utime(body_path)
+        except OSError:
+            return None
+        with self.__lock:
+            if (self.__index is not None) and (key in self.__index):
+                self.__index[key][1] = time.time()
+
+        response = requests.Response()
+        response.url = metadata['url']
+        response.status_code = metadata['status_code']
+        response.reason = metadata['reason']
+        response.encoding = metadata['encoding']
+        response.headers = requests.structures.CaseInsensitiveDict(metadata['headers'])
+        response._content = content
+        response.from_cache = True
+        return response
+
+    def store(self, key: str, response: requests.Response):
+        metadata = {
+            'url': response.url,
+            'status_code': response.status_code,
+            'reason': response.reason,
+            'encoding': response.encoding,
+            # the body is stored decoded
+            'headers': {
+                k: v
+                for k, v in response.headers.items()
+                if k.lower() not in ('content-encoding', 'content-length', 'transfer-encoding')
+            },
+        }
+        Response_Cache.__write(self.__path(key, '.gz'), gzip.compress(response.content))
+        Response_Cache.__write(
+            self.__path(key, '.json'), json.dumps(metadata, ensure_ascii=False).encode('utf-8')
+        )
+        response.from_cache = False
+        self.count('stored')
+        self.__track(key, os.path.getsize(self.__path(key, '.gz')))
+
+    def revalidated(self, key: str, metadata: Mapping[str, Any], response: requests.Response):
+        # merges the headers of a `304` into the entry and restarts its age
+        headers = requests.structures.CaseInsensitiveDict(metadata['headers'])
+        for name in ('Cache-Control', 'Date', 'ETag', 'Expires', 'Last-Modified', 'Vary'):
+            if name in response.headers:
+                headers[name] = response.headers[name]
+        metadata = {k: v for k, v in metadata.items() if k not in ('stored_time', 'fresh')}
+        metadata['headers'] = dict(headers)
+        Response_Cache.__write(
+            self.__path(key, '.json'), json.dumps(metadata, ensure_ascii=False).encode('utf-8')
+        )
+        with self.__lock:
+            # like the mtime of the json file, for `max_age` in `__track`
+            if (self.__index is not None) and (key in self.__index):
+                self.__index[key][2] = time.time()
+        self.count('revalidated')
+
+    @staticmethod
+    def __write(path: str, data: bytes):
+        with af.atomic_write(path) as f:
+            f.write(data)
+
+    def __remove(self, key: str):
+        # the json file first, so that a half removed entry no longer exists
+        for suffix in ('.json', '.gz'):
+            try:
+                os.remove(self.__path(key, suffix))
+            except FileNotFoundError:
+                pass
+        with self.__lock:
+            if (self.__index is not None) and ((entry := self.__index.pop(key, None)) is not None):
+                self.__total_size -= entry[0]
+            self.__stats['evicted'] += 1
+
+    def __scan(self) -> Dict[str, list]:
+        index: Dict[str, list] = dict()
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.gz'):
+                key = entry.name[:-3]
+                try:
+                    stored_time = os.stat(self.__path(key, '.json')).st_mtime
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                index[key] = [stat.st_size, stat.st_mtime, stored_time]
+        return index
+
+    def __track(self, key: str, size: int):
+        now = time.time()
+        with self.__lock:
+            if self.__index is None:
+                self.__index = self.__scan()
+                self.__total_size = sum(e[0] for e in self.__index.values())
+            if (entry := self.__index.get(key)) is not None:
+                self.__total_size -= entry[0]
+            self.__index[key] = [size, now, now]
+            self.__total_size += size
+
+            expired_key_list = []
+            if self.max_age is not None:
+                expired_key_list = [
+                    k for k, e in self.__index.items() if self.max_age < now - e[2]
+                ]
+            if (self.max_size is not None) and (self.max_size < self.__total_size):
+                # least recently used first
+                total_size = self.__total_size - sum(
+                    self.__index[k][0] for k in expired_key_list
+                )
+                expired_key_set = set(expired_key_list)
+                for k, e in sorted(self.__index.items(), key=lambda p: p[1][1]):
+                    if total_size <= self.max_size:
+                        break
+                    if (k != key) and (k not in expired_key_set):
+                        expired_key_list.append(k)
+                        total_size -= e[0]
+        for k in expired_key_list:
+            self.__remove(k)
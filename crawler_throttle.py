@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import datetime as dt
+import email.utils
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class Adaptive_Throttle(object):
+    # Per host (`host:port`) delay between the starts of two requests, adapted
+    # to the answers of that host:
+    #     - a status in `backoff_status_codes` or an error (`status_code` None)
+    #       multiplies the delay by `backoff_factor`, a `Retry-After` is always
+    #       waited for in full
+    #     - a latency above `latency_factor` times its moving average (EWMA
+    #       with `latency_alpha`) multiplies it by `latency_backoff_factor`
+    #     - any other answer multiplies it by `recovery_factor`
+    # always kept within `delay_range`.  Every wait is the delay scaled by a
+    # random factor in [1 - jitter, 1 + jitter].
+    #
+    # Thread safe: `wait` reserves the start time of a request under the lock
+    # and sleeps outside of it, so concurrent requests to one host are spaced
+    # too, while requests to other hosts do not wait for each other.
+    def __init__(
+        self,
+        /,
+        *,
+        delay_range: Tuple[float, float] = (0.0, 60.0),
+        initial_delay: float = 1.0,
+        jitter: float = 0.25,
+        backoff_factor: float = 2.0,
+        latency_backoff_factor: float = 1.5,
+        recovery_factor: float = 0.9,
+        latency_factor: float = 2.0,
+        latency_alpha: float = 0.2,
+        backoff_status_codes: Tuple[int, ...] = (429, 503),
+    ):
+        if not (0.0 <= delay_range[0] <= delay_range[1]):
+            raise ValueError('invalid delay range: {}'.format(delay_range))
+        self.delay_range = delay_range
+        self.initial_delay = min(max(initial_delay, delay_range[0]), delay_range[1])
+        self.jitter = jitter
+        self.backoff_factor = backoff_factor
+        self.latency_backoff_factor = latency_backoff_factor
+        self.recovery_factor = recovery_factor
+        self.latency_factor = latency_factor
+        self.latency_alpha = latency_alpha
+        self.backoff_status_codes = backoff_status_codes
+        self.__lock = threading.Lock()
+        self.__delay_dict: Dict[str, float] = dict()
+        self.__latency_dict: Dict[str, float] = dict()  # EWMA
+        self.__next_time_dict: Dict[str, float] = dict()
+
+    def delay(self, host: str) -> float:
+        with self.__lock:
+            return self.__delay_dict.get(host, self.initial_delay)
+
+    def delays(self) -> Dict[str, float]:
+        with self.__lock:
+            return dict(self.__delay_dict)
+
+    def wait(self, host: str):
+        with self.__lock:
+            now = time.monotonic()
+            start_time = max(now, self.__next_time_dict.get(host, now))
+            delay = self.__delay_dict.setdefault(host, self.initial_delay)
+            self.__next_time_dict[host] = start_time + delay * random.uniform(
+                1.0 - self.jitter, 1.0 + self.jitter
+            )
+        if now < start_time:
+            time.sleep(start_time - now)
+
+    def report(
+        self,
+        host: str,
+        status_code: Optional[int],
+        latency: float,
+        /,
+        *,
+        retry_after: Optional[float] = None,
+    ):
+        # `status_code` None for a request that failed without an answer
+        with self.__lock:
+            delay = self.__delay_dict.get(host, self.initial_delay)
+            average_latency = self.__latency_dict.get(host)
+            if (status_code is None) or (status_code in self.backoff_status_codes):
+                delay = Adaptive_Throttle.__nonzero(delay, self.initial_delay) * self.backoff_factor
+            elif (average_latency is not None) and (
+                self.latency_factor * average_latency < latency
+            ):
+                delay = (
+                    Adaptive_Throttle.__nonzero(delay, self.initial_delay)
+                    * self.latency_backoff_factor
+                )
+            else:
+                delay *= self.recovery_factor
+            delay = min(max(delay, self.delay_range[0]), self.delay_range[1])
+            self.__delay_dict[host] = delay
+
+            if status_code is not None:
+                self.__latency_dict[host] = (
+                    latency
+                    if average_latency is None
+                    else average_latency + self.latency_alpha * (latency - average_latency)
+                )
+            if retry_after is not None:
+                self.__next_time_dict[host] = max(
+                    self.__next_time_dict.get(host, 0.0), time.monotonic() + retry_after
+                )
+
+    @staticmethod
+    def __nonzero(delay: float, initial_delay: float) -> float:
+        # a delay of 0 would stay 0 when multiplied
+        return delay if 0.0 < delay else max(initial_delay, 0.1)
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        # `Retry-After` is either seconds or an http date
+        if value is None:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            retry_time = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_time.tzinfo is None:
+            retry_time = retry_time.replace(tzinfo=dt.timezone.utc)
+        return max(0.0, retry_time.timestamp() - time.time())
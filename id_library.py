@@ -1,18 +1,414 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+from __future__ import annotations
+
+import binascii
+import bisect
+import concurrent.futures
+import contextlib
+import dataclasses as dcs
+import fcntl
+import hashlib
+import itertools
 import math
+import os
 import random
-import uuid
-from typing import List, Set, Tuple
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 import numpy
-import pandas
 import scipy.stats
 
+from tty7tyil_python import atomic_file as af
+
+
+HEX_DIGITS = '0123456789ABCDEF'
+
+
+# For a length up to 16, the maximum possible digit entropy is reached exactly
+# by the strings without any repeated digit, so those can be produced directly
+# instead of being searched for with random uuids.
+def enumerate_max_entropy(
+    length: int,
+    leading_char_lower_limit: str = '1',  # inclusive
+    leading_char_upper_limit: str = 'F',  # inclusive
+) -> Iterator[str]:
+    # all of them, in lexicographic order
+    if not (0 < length <= 16):
+        raise ValueError('length of max entropy id must be in [1, 16]')
+    lcll = int(leading_char_lower_limit, 16)
+    lcul = int(leading_char_upper_limit, 16)
+    for leading_char in HEX_DIGITS[lcll:lcul + 1]:
+        for p in itertools.permutations(HEX_DIGITS.replace(leading_char, ''), length - 1):
+            yield ''.join((leading_char, *p))
+
+
+def sample_max_entropy(
+    length: int,
+    k: int = 1,
+    leading_char_lower_limit: str = '1',  # inclusive
+    leading_char_upper_limit: str = 'F',  # inclusive
+    *,
+    seed: Optional[int] = None,
+) -> Tuple[str, ...]:
+    # uniformly, with replacement
+    if not (0 < length <= 16):
+        raise ValueError('length of max entropy id must be in [1, 16]')
+    lcll = int(leading_char_lower_limit, 16)
+    lcul = int(leading_char_upper_limit, 16)
+    rng = numpy.random.default_rng(seed)
+    digits = numpy.empty((k, length), dtype=numpy.uint8)
+    digits[:, 0] = rng.integers(lcll, lcul + 1, size=k, dtype=numpy.uint8)
+    # the other digits are drawn from the 15 left, shifted over the leading one
+    rest = rng.permuted(numpy.tile(numpy.arange(15, dtype=numpy.uint8), (k, 1)), axis=1)
+    rest = rest[:, :length - 1]
+    digits[:, 1:] = rest + (digits[:, :1] <= rest)
+    char_string = numpy.frombuffer(HEX_DIGITS.encode('ascii'), dtype=numpy.uint8)[digits]
+    char_string = char_string.tobytes().decode('ascii')
+    return tuple(char_string[i:i + length] for i in range(0, len(char_string), length))
+
+
+class Top_Entropy_Selector:
+    # Streaming equivalent of `ID_Library.__top_entropy`: keeps every value in
+    # the entropy tiers that are still needed to hold `at_least` values, drops
+    # a lower tier as soon as the tiers above it hold enough on their own.
+    def __init__(self, at_least: int = 10):
+        self.at_least = at_least
+        self.__tier_dict: Dict[numpy.float64, Set[str]] = dict()
+        self.__tier_key_list: List[numpy.float64] = []  # ascending
+        self.__count = 0
+
+    def __len__(self) -> int:
+        return self.__count
+
+    @property
+    def threshold(self) -> float:
+        # lowest entropy that may still be accepted
+        if self.__count < self.at_least:
+            return -math.inf
+        return self.__tier_key_list[0]
+
+    @property
+    def top(self) -> Optional[numpy.float64]:
+        return self.__tier_key_list[-1] if self.__tier_key_list else None
+
+    def add(self, value: str, entropy: numpy.float64) -> bool:
+        if entropy < self.threshold:
+            return False
+        if (tier := self.__tier_dict.get(entropy)) is None:
+            tier = self.__tier_dict[entropy] = set()
+            bisect.insort(self.__tier_key_list, entropy)
+        if value in tier:
+            return False
+        tier.add(value)
+        self.__count += 1
+        while (
+            1 < len(self.__tier_key_list)
+            and self.at_least <= self.__count - len(self.__tier_dict[self.__tier_key_list[0]])
+        ):
+            self.__count -= len(self.__tier_dict.pop(self.__tier_key_list.pop(0)))
+        return True
+
+    def update(self, value_iter: Iterable[Tuple[str, numpy.float64]]):
+        for value, entropy in value_iter:
+            self.add(value, entropy)
+
+    def result(self) -> Set[Tuple[str, numpy.float64]]:
+        return {(v, k) for k, tier in self.__tier_dict.items() for v in tier}
+
+
+class Issued_ID_Registry:
+    # Remembers every id ever issued, shared by all processes that open the
+    # same `path`.  Membership is first tested against a memory-mapped bloom
+    # filter (`path`), which answers "never issued" in constant time; only a
+    # positive answer is confirmed against the exact, append-only log of ids
+    # (`path` + '.log'), which is read incrementally into a set.
+    #
+    # Inserts hold an exclusive `fcntl.flock` on the log, so the check and the
+    # insert are atomic across processes.  `capacity` and `error_rate` size the
+    # bloom filter when the registry is created, an existing one keeps its own.
+    __FILE_MAGIC = b'TTY7IDBF'
+    __FILE_VERSION = 1
+    __FILE_HEADER_DTYPE = numpy.dtype(
+        [
+            ('magic', 'S8'),
+            ('version', '<u4'),
+            ('hash_count', '<u4'),
+            ('bit_count', '<u8'),
+            ('count', '<u8'),
+            ('padding', 'V32'),
+        ]
+    )
+
+    def __init__(self, path: str, /, *, capacity: int = 2**24, error_rate: float = 1e-6):
+        self.path = path
+        self.log_path = path + '.log'
+        self.__lock = threading.Lock()
+        self.__log_file = open(self.log_path, mode='a+b')
+        self.__log_offset = 0
+        self.__issued_set: Set[str] = set()
+        with self.__file_lock():
+            if not os.path.exists(path):
+                Issued_ID_Registry.__create(path, capacity, error_rate)
+        self.__header = numpy.memmap(
+            path, dtype=Issued_ID_Registry.__FILE_HEADER_DTYPE, mode='r+', shape=(1,)
+        )
+        if self.__header['magic'][0] != Issued_ID_Registry.__FILE_MAGIC:
+            raise ValueError('not an issued id registry file: {}'.format(path))
+        if self.__header['version'][0] != Issued_ID_Registry.__FILE_VERSION:
+            raise ValueError(
+                'unsupported issued id registry file version: {}'.format(
+                    self.__header['version'][0]
+                )
+            )
+        self.__hash_count = int(self.__header['hash_count'][0])
+        self.__bit_count = int(self.__header['bit_count'][0])
+        self.__bit_array = numpy.memmap(
+            path,
+            dtype=numpy.uint8,
+            mode='r+',
+            offset=Issued_ID_Registry.__FILE_HEADER_DTYPE.itemsize,
+            shape=((self.__bit_count + 7) // 8,),
+        )
+
+    @staticmethod
+    def __create(path: str, capacity: int, error_rate: float):
+        # the usual optimum: m = -n ln(p) / ln(2)^2 bits and k = m / n ln(2) hashes
+        bit_count = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        header = numpy.zeros(1, dtype=Issued_ID_Registry.__FILE_HEADER_DTYPE)
+        header['magic'] = Issued_ID_Registry.__FILE_MAGIC
+        header['version'] = Issued_ID_Registry.__FILE_VERSION
+        header['hash_count'] = max(1, round(bit_count / capacity * math.log(2)))
+        header['bit_count'] = bit_count
+        with af.atomic_write(path) as f:
+            f.write(header.tobytes())
+            f.truncate(header.itemsize + (bit_count + 7) // 8)
+
+    @contextlib.contextmanager
+    def __file_lock(self):
+        with self.__lock:
+            fcntl.flock(self.__log_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self.__log_file.fileno(), fcntl.LOCK_UN)
+
+    def __len__(self) -> int:
+        return int(self.__header['count'][0])
+
+    def close(self):
+        self.__log_file.close()
+        self.__bit_array.flush()
+        del self.__bit_array, self.__header
+
+    def __enter__(self) -> Issued_ID_Registry:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __bit_positions(self, value: str) -> List[int]:
+        # double hashing over the two halves of one 128-bit digest
+        digest = hashlib.blake2b(value.encode('ascii'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.__bit_count for i in range(self.__hash_count)]
+
+    def __maybe_issued(self, position_list: List[int]) -> bool:
+        bit_array = self.__bit_array
+        return all(bit_array[p >> 3] & (1 << (p & 7)) for p in position_list)
+
+    def __read_log(self):
+        # Reads what other processes appended since the last call, up to the
+        # last complete line: an insert in progress is picked up next time.
+        self.__log_file.seek(self.__log_offset)
+        data = self.__log_file.read()
+        end = data.rfind(b'\n') + 1
+        self.__issued_set.update(data[:end].decode('ascii').split())
+        self.__log_offset += end
+
+    def __contains__(self, value: str) -> bool:
+        if not self.__maybe_issued(self.__bit_positions(value)):
+            return False
+        with self.__lock:
+            if value not in self.__issued_set:
+                self.__read_log()
+            return value in self.__issued_set
+
+    def add(self, value: str) -> bool:
+        # False if `value` was already issued
+        return self.add_many((value,))[0]
+
+    def add_many(self, value_iter: Iterable[str]) -> List[bool]:
+        # One lock for the whole batch.  The log is appended before the bits are
+        # set, so a bloom positive is always backed by the log.
+        result_list = []
+        with self.__file_lock():
+            line_list = []
+            position_list_list = []
+            for value in value_iter:
+                position_list = self.__bit_positions(value)
+                if (value not in self.__issued_set) and self.__maybe_issued(position_list):
+                    self.__read_log()
+                if value in self.__issued_set:
+                    result_list.append(False)
+                    continue
+                self.__issued_set.add(value)  # also catches duplicates within the batch
+                line_list.append(value + '\n')
+                position_list_list.append(position_list)
+                result_list.append(True)
+
+            if len(line_list) != 0:
+                self.__read_log()  # so that the offset skips only our own lines
+                self.__log_file.write(''.join(line_list).encode('ascii'))
+                self.__log_file.flush()
+                self.__log_offset = self.__log_file.tell()
+                bit_array = self.__bit_array
+                for position_list in position_list_list:
+                    for p in position_list:
+                        bit_array[p >> 3] |= 1 << (p & 7)
+                self.__header['count'] += len(line_list)
+        return result_list
+
+
+class ID_Pool:
+    # Hands out every id at most once, in random order.  Once no more than
+    # `low_water_mark` ids are left, `on_low_water` is called (outside of the
+    # lock, once per crossing) so that a refill can be scheduled.
+    #
+    # With a `registry`, every id taken is also recorded there, and ids that
+    # were already issued (by any process sharing the registry) are dropped.
+    def __init__(
+        self,
+        value_iter: Iterable[str] = (),
+        /,
+        *,
+        low_water_mark: int = 0,
+        on_low_water: Optional[Callable[[ID_Pool], None]] = None,
+        registry: Optional[Issued_ID_Registry] = None,
+    ):
+        self.low_water_mark = low_water_mark
+        self.on_low_water = on_low_water
+        self.registry = registry
+        self.__lock = threading.Lock()
+        self.__value_list: List[str] = []
+        self.__known_set: Set[str] = set()
+        self.__low_water_reported = False
+        self.refill(value_iter)
+
+    def __len__(self) -> int:
+        return len(self.__value_list)
+
+    @property
+    def remaining(self) -> int:
+        return len(self.__value_list)
+
+    @property
+    def is_low(self) -> bool:
+        return len(self.__value_list) <= self.low_water_mark
+
+    def refill(self, value_iter: Iterable[str]) -> int:
+        # ids that were ever in this pool are skipped, returns how many are added
+        with self.__lock:
+            count = len(self.__value_list)
+            for value in value_iter:
+                if value not in self.__known_set:
+                    self.__known_set.add(value)
+                    self.__value_list.append(value)
+            count = len(self.__value_list) - count
+            if not self.is_low:
+                self.__low_water_reported = False
+        return count
+
+    def take(self, k: int = 1) -> Tuple[str, ...]:
+        with self.__lock:
+            if len(self.__value_list) < k:
+                raise IndexError(
+                    'cannot take {} ids from a pool of {}'.format(k, len(self.__value_list))
+                )
+            taken: List[str] = []
+            while len(taken) < k:
+                if len(self.__value_list) < k - len(taken):
+                    # the ids taken so far are already registered, they are lost
+                    raise IndexError(
+                        'pool ran out of ids not issued yet, {} left'.format(
+                            len(self.__value_list)
+                        )
+                    )
+                candidate_list = []
+                for _ in range(k - len(taken)):
+                    # swap a random remaining id to the end and pop it
+                    i = random.randrange(len(self.__value_list))
+                    self.__value_list[i], self.__value_list[-1] = (
+                        self.__value_list[-1], self.__value_list[i]
+                    )
+                    candidate_list.append(self.__value_list.pop())
+                if self.registry is None:
+                    taken.extend(candidate_list)
+                else:
+                    taken.extend(
+                        itertools.compress(candidate_list, self.registry.add_many(candidate_list))
+                    )
+            report = self.is_low and not self.__low_water_reported
+            if report:
+                self.__low_water_reported = True
+        if report and (self.on_low_water is not None):
+            self.on_low_water(self)
+        return tuple(taken)
+
+
+@dcs.dataclass
+class Populate_Progress:
+    total: int
+    done: int = 0  # candidates drawn
+    accepted: int = 0  # candidates within the leading char limits
+    elapsed: float = 0.0
+    # highest entropy so far of uuid4, len16, len12 and len8
+    top_entropy: Tuple[Optional[numpy.float64], ...] = (None, None, None, None)
+    # seconds, summed over all workers
+    generation_time: float = 0.0
+    entropy_time: float = 0.0
+    selection_time: float = 0.0
+    finished: bool = False
+
+    @property
+    def candidates_per_second(self) -> float:
+        return self.done / self.elapsed if 0 < self.elapsed else 0.0
+
+    @property
+    def acceptance_rate(self) -> float:
+        return self.accepted / self.done if 0 < self.done else 0.0
+
+
+def print_populate_progress(progress: Populate_Progress):
+    # redrawn in place on a terminal, one line per report otherwise
+    percent = progress.done / progress.total
+    bar_len = 50
+    left_bar = math.floor(bar_len * percent)
+    line = 'PROGRESS: {:_>{}} / {}  [{}{}{}] {: >5}%  {:.0f}/s'.format(
+        progress.done, len(str(progress.total)), progress.total,
+        '=' * left_bar,
+        '>' if left_bar < bar_len else '',
+        ' ' * (bar_len - left_bar - 1),
+        int(percent * 100 * 10) / 10,
+        progress.candidates_per_second,
+    )
+    if sys.stdout.isatty():
+        print(line, end='\n' if progress.finished else '\r', flush=True)
+    else:
+        print(line, flush=True)
+
 
 class ID_Library:
     def __init__(self, power: int = None):
+        # record arrays of a loaded pool file, see `load`
+        self.__mapped: Dict[str, numpy.ndarray] = dict()
+        self.__value_cache: Dict[
+            str, Tuple[Set[Tuple[str, numpy.float64]], int, Tuple[str, ...]]
+        ] = dict()
         self.uuid4_set: Set[Tuple[str, numpy.float64]] = set()
         self.len16_set: Set[Tuple[str, numpy.float64]] = set()
         self.len12_set: Set[Tuple[str, numpy.float64]] = set()
@@ -26,66 +422,79 @@ class ID_Library:
         leading_char_lower_limit: str = '1',  # inclusive
         leading_char_upper_limit: str = 'F',  # inclusive
         show_progress: bool = True,
+        *,
+        block_size: int = 2 ** 14,
+        workers: int = 1,
+        seed: Optional[int] = None,
+        progress: Optional[Callable[[Populate_Progress], None]] = None,
+        progress_interval: float = 0.5,
     ):
-        uuid4_list: List[Tuple[str, numpy.float64]] = []
-        len16_list: List[Tuple[str, numpy.float64]] = []
-        len12_list: List[Tuple[str, numpy.float64]] = []
-        len8_list: List[Tuple[str, numpy.float64]] = []
-
-        lcll = (int(leading_char_lower_limit, 16) * 0x_1000_0000_0000_0000_0000_0000_0000_0000) - 1
-        lcul = (int(leading_char_upper_limit, 16) + 1) * 0x_1000_0000_0000_0000_0000_0000_0000_0000
-
-        for i in range(2 ** power):
-            uuid4 = uuid.uuid4()
-            if lcll < uuid4.int < lcul:
-                uuid4_list.append(
-                    (
-                        str(uuid4).upper(),
-                        scipy.stats.entropy(pandas.Series(c for c in uuid4.hex).value_counts()),
-                    )
-                )
-                len16_list.append(
-                    (
-                        value := uuid4.hex[:16].upper(),
-                        scipy.stats.entropy(pandas.Series(c for c in value).value_counts()),
-                    )
-                )
-                len12_list.append(
-                    (
-                        value := uuid4.hex[:12].upper(),
-                        scipy.stats.entropy(pandas.Series(c for c in value).value_counts()),
-                    )
-                )
-                len8_list.append(
-                    (
-                        value := uuid4.hex[:8].upper(),
-                        scipy.stats.entropy(pandas.Series(c for c in value).value_counts()),
-                    )
-                )
+        # The candidates are drawn block by block, each block is reduced to its
+        # own top entropy candidates (a "shard") and merged into the result
+        # right away.  With `seed` given, every block draws from its own child
+        # of `numpy.random.SeedSequence(seed)`, so the result only depends on
+        # `seed`, `power` and `block_size`, but not on `workers`.
+        #
+        # `progress` is called with a `Populate_Progress` at most once every
+        # `progress_interval` seconds, and once more when finished.  Without
+        # it, `show_progress` prints with `print_populate_progress`.
+        if (progress is None) and show_progress:
+            progress = print_populate_progress
+        lcll = int(leading_char_lower_limit, 16)
+        lcul = int(leading_char_upper_limit, 16)
 
-            if show_progress:
-                total = 2 ** power
-                percent = (i + 1) / total
-                bar_len = 50
-                left_bar = math.floor(bar_len * percent)
-                print(
-                    'PROGRESS: {:_>{}} / {}  [{}{}{}] {: >5}%'.format(
-                        i + 1, len(str(total)), total,
-                        '=' * left_bar,
-                        '>' if left_bar < bar_len else '',
-                        ' ' * (bar_len - left_bar - 1),
-                        int(percent * 100 * 10) / 10,
-                    ),
-                    end='',
+        total = 2 ** power
+        block_count = math.ceil(total / block_size)
+        block_seed_list: List[Optional[numpy.random.SeedSequence]] = (
+            [None] * block_count
+            if seed is None
+            else numpy.random.SeedSequence(seed).spawn(block_count)
+        )
+        shard_args = (
+            (
+                min(block_size, total - i * block_size),
+                block_seed_list[i],
+                lcll,
+                lcul,
+            )
+            for i in range(block_count)
+        )
+
+        selector_tuple = tuple(Top_Entropy_Selector() for _ in range(4))
+        metrics = Populate_Progress(total=total)
+        start_time = last_report_time = time.perf_counter()
+
+        with contextlib.ExitStack() as stack:
+            if workers > 1:
+                executor = stack.enter_context(
+                    concurrent.futures.ProcessPoolExecutor(max_workers=workers)
                 )
-                print('\r', end='')
+                shard_iter = executor.map(ID_Library._populate_shard, *zip(*shard_args))
+            else:
+                shard_iter = (ID_Library._populate_shard(*args) for args in shard_args)
+
+            for n, accepted, shard_time, *shard_set_list in shard_iter:
+                merge_start_time = time.perf_counter()
+                for selector, shard_set in zip(selector_tuple, shard_set_list):
+                    selector.update(shard_set)
+
+                metrics.done += n
+                metrics.accepted += accepted
+                metrics.generation_time += shard_time[0]
+                metrics.entropy_time += shard_time[1]
+                metrics.selection_time += shard_time[2] + time.perf_counter() - merge_start_time
+                now = time.perf_counter()
+                if (progress is not None) and (
+                    (progress_interval <= now - last_report_time) or (metrics.done == total)
+                ):
+                    last_report_time = now
+                    metrics.elapsed = now - start_time
+                    metrics.top_entropy = tuple(s.top for s in selector_tuple)
+                    metrics.finished = metrics.done == total
+                    progress(dcs.replace(metrics))
 
-        uuid4_set = ID_Library.__top_entropy(set(uuid4_list))
-        len16_set = ID_Library.__top_entropy(set(len16_list))
-        len12_set = ID_Library.__top_entropy(set(len12_list))
-        len8_set = ID_Library.__top_entropy(set(len8_list))
         uuid4_set, len16_set, len12_set, len8_set = ID_Library.__trim(
-            uuid4_set, len16_set, len12_set, len8_set
+            *(selector.result() for selector in selector_tuple)
         )
 
         self.uuid4_set |= uuid4_set
@@ -98,6 +507,140 @@ class ID_Library:
         self.len12_set = ID_Library.__top_entropy(self.len12_set)
         self.len8_set = ID_Library.__top_entropy(self.len8_set)
 
+    def populate_max_entropy(
+        self,
+        k: int = 2 ** 10,
+        leading_char_lower_limit: str = '1',  # inclusive
+        leading_char_upper_limit: str = 'F',  # inclusive
+        *,
+        seed: Optional[int] = None,
+    ):
+        # len16, len12 and len8 are maxed out (see the record at the bottom),
+        # so their candidates are sampled from `sample_max_entropy` directly
+        seed_list: List[Optional[numpy.random.SeedSequence]] = (
+            [None] * 3 if seed is None else numpy.random.SeedSequence(seed).spawn(3)
+        )
+        for (kind, length), s in zip((('len16', 16), ('len12', 12), ('len8', 8)), seed_list):
+            # same value as the histogram path of `populate` gives
+            entropy = scipy.stats.entropy(numpy.ones(length, dtype=numpy.int64))
+            value_set = {
+                (value, entropy)
+                for value in sample_max_entropy(
+                    length, k, leading_char_lower_limit, leading_char_upper_limit, seed=s
+                )
+            }
+            setattr(
+                self,
+                kind + '_set',
+                ID_Library.__top_entropy(getattr(self, kind + '_set') | value_set),
+            )
+
+    @staticmethod
+    def _populate_shard(
+        n: int,
+        block_seed: Optional[numpy.random.SeedSequence],
+        lcll: int,
+        lcul: int,
+    ) -> Tuple[
+        int,
+        int,
+        Tuple[float, float, float],
+        Set[Tuple[str, numpy.float64]],
+        Set[Tuple[str, numpy.float64]],
+        Set[Tuple[str, numpy.float64]],
+        Set[Tuple[str, numpy.float64]],
+    ]:
+        # Not name-mangled so that it can be pickled for the process pool.
+        # Gives the candidate count, the accepted count, the time spent in
+        # generation, entropy and selection, then the four top entropy sets.
+        time_0 = time.perf_counter()
+        raw = ID_Library.__draw_uuid4_block(n, block_seed)
+        nibbles = ID_Library.__to_nibbles(raw)
+        accepted = (lcll <= nibbles[:, 0]) & (nibbles[:, 0] <= lcul)
+        raw, nibbles = raw[accepted], nibbles[accepted]
+        time_1 = time.perf_counter()
+
+        # only the candidates that can still make it into a selector are
+        # turned into strings, highest entropy first so the threshold rises
+        # as early as possible
+        entropy_dict = ID_Library.__prefix_entropy(nibbles)
+        time_2 = time.perf_counter()
+        result_list = []
+        for length in (32, 16, 12, 8):  # uuid4, len16, len12, len8
+            entropy = entropy_dict[length]
+            selector = Top_Entropy_Selector()
+            for i in numpy.argsort(-entropy, kind='stable'):
+                if entropy[i] < selector.threshold:
+                    break
+                value = raw[i].tobytes().hex().upper()
+                if length == 32:
+                    value = '-'.join(
+                        (value[:8], value[8:12], value[12:16], value[16:20], value[20:])
+                    )
+                else:
+                    value = value[:length]
+                selector.add(value, entropy[i])
+            result_list.append(selector.result())
+
+        time_3 = time.perf_counter()
+
+        return (n, len(raw), (time_1 - time_0, time_2 - time_1, time_3 - time_2), *result_list)
+
+    @staticmethod
+    def __draw_uuid4_block(
+        n: int, block_seed: Optional[numpy.random.SeedSequence] = None
+    ) -> numpy.ndarray:
+        # same source (unless seeded) and the same version / variant bits as
+        # `uuid.uuid4`, one row of 16 bytes per uuid
+        random_bytes = (
+            os.urandom(16 * n)
+            if block_seed is None
+            else numpy.random.default_rng(block_seed).bytes(16 * n)
+        )
+        raw = numpy.frombuffer(random_bytes, dtype=numpy.uint8).reshape(n, 16).copy()
+        raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+        raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+        return raw
+
+    @staticmethod
+    def __to_nibbles(raw: numpy.ndarray) -> numpy.ndarray:
+        nibbles = numpy.empty((len(raw), 32), dtype=numpy.uint8)
+        nibbles[:, 0::2] = raw >> 4
+        nibbles[:, 1::2] = raw & 0x0F
+        return nibbles
+
+    # entropy only depends on the sorted digit histogram, and there are only a
+    # few thousand of them, so every distinct one is handed to `scipy` exactly
+    # once (in the same descending order as `pandas.Series.value_counts`) to
+    # keep the values bit-for-bit identical to the per-uuid computation
+    __entropy_by_histogram: Dict[bytes, numpy.float64] = dict()
+
+    @staticmethod
+    def __prefix_entropy(nibbles: numpy.ndarray) -> Dict[int, numpy.ndarray]:
+        one_hot = nibbles[:, :, None] == numpy.arange(16, dtype=numpy.uint8)
+        histogram = numpy.zeros((len(nibbles), 16), dtype=numpy.uint8)
+        entropy: Dict[int, numpy.ndarray] = dict()
+        begin = 0
+        for end in (8, 12, 16, 32):
+            histogram += one_hot[:, begin:end].sum(axis=1, dtype=numpy.uint8)
+            begin = end
+            histogram_sorted = numpy.ascontiguousarray(numpy.sort(histogram, axis=1))
+            key_array, inverse = numpy.unique(
+                histogram_sorted.view(numpy.dtype((numpy.void, 16))).ravel(),
+                return_inverse=True,
+            )
+            value_array = numpy.empty(len(key_array), dtype=numpy.float64)
+            for i, k in enumerate(key_array):
+                k = k.tobytes()
+                if (value := ID_Library.__entropy_by_histogram.get(k)) is None:
+                    value = scipy.stats.entropy(
+                        numpy.array([c for c in reversed(k) if c != 0], dtype=numpy.int64)
+                    )
+                    ID_Library.__entropy_by_histogram[k] = value
+                value_array[i] = value
+            entropy[end] = value_array[inverse.ravel()]
+        return entropy
+
     @staticmethod
     def __top_entropy(
         value_set: Set[Tuple[str, numpy.float64]], at_least: int = 10
@@ -128,17 +671,189 @@ class ID_Library:
                 len8_set.remove(test)
         return uuid4_set, len16_set, len12_set, len8_set
 
-    def uuid4(self, k: int = 1) -> Tuple[str, ...]:
-        return tuple(e[0] for e in random.choices(tuple(self.uuid4_set), k=k))
+    # Pool file layout (little endian, fixed width, no alignment):
+    #     header : `__FILE_HEADER_DTYPE`, with the record count of every kind
+    #     records: uuid4, len16, len12 and len8 in that order, each record is
+    #              the packed id bytes followed by its float64 entropy
+    __FILE_MAGIC = b'TTY7IDLB'
+    __FILE_VERSION = 1
+    __FILE_HEADER_DTYPE = numpy.dtype(
+        [
+            ('magic', 'S8'),
+            ('version', '<u4'),
+            ('reserved', '<u4'),
+            ('count', '<u8', (4,)),
+            ('padding', 'V16'),
+        ]
+    )
+    __KIND_ID_BYTES = (('uuid4', 16), ('len16', 8), ('len12', 6), ('len8', 4))
+
+    @staticmethod
+    def __record_dtype(id_bytes: int) -> numpy.dtype:
+        return numpy.dtype([('id', 'u1', (id_bytes,)), ('entropy', '<f8')])
+
+    def __getattr__(self, name: str):
+        # the sets of a loaded library are only decoded on first access, until
+        # then the memory-mapped records are used as they are
+        mapped = self.__dict__.get('_ID_Library__mapped', {})
+        if name.endswith('_set') and (kind := name[:-4]) in mapped:
+            record_array = mapped.pop(kind)
+            value_set = set(
+                zip(
+                    ID_Library.__decode_id(kind, record_array['id']),
+                    record_array['entropy'].astype(numpy.float64),
+                )
+            )
+            setattr(self, name, value_set)
+            return value_set
+        raise AttributeError(
+            '{!r} object has no attribute {!r}'.format(type(self).__name__, name)
+        )
+
+    @staticmethod
+    def __decode_id(kind: str, id_array: numpy.ndarray) -> List[str]:
+        hex_string = binascii.hexlify(id_array.tobytes()).decode('ascii').upper()
+        width = id_array.shape[1] * 2
+        value_list = [hex_string[i:i + width] for i in range(0, len(hex_string), width)]
+        if kind == 'uuid4':
+            value_list = [
+                '-'.join((value[:8], value[8:12], value[12:16], value[16:20], value[20:]))
+                for value in value_list
+            ]
+        return value_list
+
+    def save(self, path: str, *, merge: bool = False):
+        # With `merge`, the records already in `path` are merged the same way
+        # `populate` merges new candidates.  The file is written aside and
+        # renamed over `path`, so processes that mapped the old file keep a
+        # consistent view.
+        set_list = [getattr(self, kind + '_set') for kind, _ in ID_Library.__KIND_ID_BYTES]
+        if merge and os.path.exists(path):
+            existing = ID_Library.load(path)
+            set_list = [
+                ID_Library.__top_entropy(s | getattr(existing, kind + '_set'))
+                for s, (kind, _) in zip(set_list, ID_Library.__KIND_ID_BYTES)
+            ]
 
-    def len16(self, k: int = 1) -> Tuple[str, ...]:
-        return tuple(e[0] for e in random.choices(tuple(self.len16_set), k=k))
+        header = numpy.zeros(1, dtype=ID_Library.__FILE_HEADER_DTYPE)
+        header['magic'] = ID_Library.__FILE_MAGIC
+        header['version'] = ID_Library.__FILE_VERSION
+        header['count'] = [len(s) for s in set_list]
 
-    def len12(self, k: int = 1) -> Tuple[str, ...]:
-        return tuple(e[0] for e in random.choices(tuple(self.len12_set), k=k))
+        with af.atomic_write(path) as f:
+            f.write(header.tobytes())
+            for value_set, (_, id_bytes) in zip(set_list, ID_Library.__KIND_ID_BYTES):
+                value_list = sorted(value_set, key=lambda e: (-e[1], e[0]))
+                record_array = numpy.empty(
+                    len(value_list), dtype=ID_Library.__record_dtype(id_bytes)
+                )
+                record_array['id'] = numpy.frombuffer(
+                    bytes.fromhex(''.join(e[0].replace('-', '') for e in value_list)),
+                    dtype=numpy.uint8,
+                ).reshape(len(value_list), id_bytes)
+                record_array['entropy'] = [e[1] for e in value_list]
+                f.write(record_array.tobytes())
+
+    @classmethod
+    def load(cls, path: str) -> ID_Library:
+        header = numpy.fromfile(path, dtype=ID_Library.__FILE_HEADER_DTYPE, count=1)
+        if (len(header) == 0) or (header['magic'][0] != ID_Library.__FILE_MAGIC):
+            raise ValueError('not an id library pool file: {}'.format(path))
+        if header['version'][0] != ID_Library.__FILE_VERSION:
+            raise ValueError(
+                'unsupported id library pool file version: {}'.format(header['version'][0])
+            )
+
+        library = cls()
+        offset = ID_Library.__FILE_HEADER_DTYPE.itemsize
+        for count, (kind, id_bytes) in zip(header['count'][0], ID_Library.__KIND_ID_BYTES):
+            record_dtype = ID_Library.__record_dtype(id_bytes)
+            if count == 0:
+                record_array = numpy.empty(0, dtype=record_dtype)
+            else:
+                record_array = numpy.memmap(
+                    path, dtype=record_dtype, mode='r', offset=offset, shape=(int(count),)
+                )
+            offset += record_dtype.itemsize * int(count)
+            library.__mapped[kind] = record_array
+            del library.__dict__[kind + '_set']
+        return library
+
+    def __value_tuple(self, kind: str) -> Tuple[str, ...]:
+        # cached per set object, rebuilt when the set is replaced or resized
+        value_set = getattr(self, kind + '_set')
+        cache = self.__value_cache.get(kind)
+        if (cache is None) or (cache[0] is not value_set) or (cache[1] != len(value_set)):
+            cache = self.__value_cache[kind] = (
+                value_set, len(value_set), tuple(e[0] for e in value_set)
+            )
+        return cache[2]
+
+    def __draw(self, kind: str, k: int) -> List[str]:
+        if (record_array := self.__mapped.get(kind)) is not None:
+            # decode only the picked records of a loaded library
+            index = random.choices(range(len(record_array)), k=k)
+            return ID_Library.__decode_id(kind, record_array['id'][index])
+        return random.choices(self.__value_tuple(kind), k=k)
 
-    def len8(self, k: int = 1) -> Tuple[str, ...]:
-        return tuple(e[0] for e in random.choices(tuple(self.len8_set), k=k))
+    def __sample(
+        self, kind: str, k: int, registry: Optional[Issued_ID_Registry]
+    ) -> Tuple[str, ...]:
+        # Without `registry`, sampled with replacement.  With it, only ids never
+        # issued before are given (and recorded as issued), drawing again for
+        # the ones rejected until too many draws failed.
+        if registry is None:
+            return tuple(self.__draw(kind, k))
+        taken: List[str] = []
+        draw_budget = 16 * k + 64
+        while len(taken) < k:
+            if draw_budget < k - len(taken):
+                raise IndexError('no {} id left that was not issued yet'.format(kind))
+            candidate_list = self.__draw(kind, k - len(taken))
+            draw_budget -= len(candidate_list)
+            taken.extend(itertools.compress(candidate_list, registry.add_many(candidate_list)))
+        return tuple(taken)
+
+    def uuid4(
+        self, k: int = 1, *, registry: Optional[Issued_ID_Registry] = None
+    ) -> Tuple[str, ...]:
+        return self.__sample('uuid4', k, registry)
+
+    def len16(
+        self, k: int = 1, *, registry: Optional[Issued_ID_Registry] = None
+    ) -> Tuple[str, ...]:
+        return self.__sample('len16', k, registry)
+
+    def len12(
+        self, k: int = 1, *, registry: Optional[Issued_ID_Registry] = None
+    ) -> Tuple[str, ...]:
+        return self.__sample('len12', k, registry)
+
+    def len8(
+        self, k: int = 1, *, registry: Optional[Issued_ID_Registry] = None
+    ) -> Tuple[str, ...]:
+        return self.__sample('len8', k, registry)
+
+    def pool(
+        self,
+        kind: str,
+        /,
+        *,
+        low_water_mark: int = 0,
+        on_low_water: Optional[Callable[[ID_Pool], None]] = None,
+        registry: Optional[Issued_ID_Registry] = None,
+    ) -> ID_Pool:
+        # `kind` is one of 'uuid4', 'len16', 'len12' and 'len8'
+        if (record_array := self.__mapped.get(kind)) is not None:
+            value_iter: Iterable[str] = ID_Library.__decode_id(kind, record_array['id'])
+        else:
+            value_iter = self.__value_tuple(kind)
+        return ID_Pool(
+            value_iter,
+            low_water_mark=low_water_mark,
+            on_low_water=on_low_water,
+            registry=registry,
+        )
 
     def __repr__(self) -> str:
         (uuid4_list := list(self.uuid4_set)).sort(key=lambda e: e[1], reverse=True)
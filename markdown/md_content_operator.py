@@ -3,35 +3,48 @@
 
 from __future__ import annotations
 
-import re
-from typing import List
+import concurrent.futures
+import contextlib
+import dataclasses as dcs
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
+from tty7tyil_python import atomic_file as af
 from tty7tyil_python import tree
 from tty7tyil_python.markdown import md_structure_data as mdsd
 from tty7tyil_python.string_et_output import normalize_string as ns
 
-TOC_BEGIN_COMMENT = '<!-- GMT TOC BEGIN -->'
-TOC_END_COMMENT = '<!-- GMT TOC END -->'
+TOC_BEGIN_COMMENT = mdsd.MD_Structure_Data.TOC_BEGIN_COMMENT
+TOC_END_COMMENT = mdsd.MD_Structure_Data.TOC_END_COMMENT
+
+
+def gen_md_anchor(content: str, serial: int = 0, /) -> str:
+    # the anchor of a header, `serial` tells apart headers with the same content
+    return '{}{}'.format(
+        ns.get_normalizer()(content), '-{}'.format(serial) if 0 < serial else ''
+    )
 
 
 def gen_md_toc(
-    md_file_content: str,
+    md_file_content: Union[str, mdsd.MD_Structure_Data],
     /,
     *,
     include_begin_end_comment: bool = False,
     bullet_char: str = '-',
     indentation: int = 2,
 ) -> str:
-    toc_tree = mdsd.MD_Structure_Data(md_file_content).toc_tree
+    # `md_file_content` can also be the content already parsed
+    if not isinstance(md_file_content, mdsd.MD_Structure_Data):
+        md_file_content = mdsd.MD_Structure_Data(md_file_content)
+    toc_tree = md_file_content.toc_tree
     toc: List[str] = []
     for b in toc_tree.branches:
-        toc.append(
-            tree.Tree.format_as_string(
+        toc.extend(
+            tree.Tree.iter_format_lines(
                 b,
-                content_parser=lambda e: '[{content}](#{anchor}{serial})'.format(
-                    content=e.content,
-                    anchor=ns.normalize_string(e.content),
-                    serial=('-{}'.format(e.serial) if 0 < e.serial else ''),
+                content_parser=lambda e: '[{}](#{})'.format(
+                    e.content, gen_md_anchor(e.content, e.serial)
                 ),
                 trunk_char=' ',
                 branch_char=bullet_char,
@@ -45,56 +58,140 @@ def gen_md_toc(
     return ''.join(toc).strip('\n')
 
 
-__REGEX_EXISTING_TOC = re.compile(
-    # This regex will match solid consecutive lines (aka no blank lines in
-    # the middle) begin with `TOC_BEGIN_COMMENT`, end with `TOC_END_COMMENT`,
-    # surrounded by at least one blank lines before and after.
-    #
-    # Therefore a TOC placeholder can be placed in the file beforehand, other
-    # than let this script insert TOC right below the first level header.
-    r'(?<=\n\n){tbc}\n(.+\n)*?{tec}(?=\n\n)'.format(
-        tbc=repr(TOC_BEGIN_COMMENT)[1:-1],
-        tec=repr(TOC_END_COMMENT)[1:-1],
-    )
-)
-__REGEX_FIRST_LEVEL_HEADER = re.compile(
-    r'^(?P<flh># .+)$',
-    flags=re.MULTILINE,
-)
+def __splice_toc(file_content: str) -> str:
+    # The TOC replaces an existing TOC placeholder (see
+    # `MD_Structure_Data.TOC_BEGIN_COMMENT`), or without one, goes right below
+    # the first level 1 header, both found by the same scan that gives the
+    # TOC.  Built from slices of `file_content`, so nothing in the TOC is taken
+    # as an escape.
+    md_structure_data = mdsd.MD_Structure_Data(file_content)
+    toc = gen_md_toc(md_structure_data, include_begin_end_comment=True)
+    if (span := md_structure_data.toc_placeholder_span) is not None:
+        return ''.join((file_content[:span[0]], toc, file_content[span[1]:]))
+    if (end := md_structure_data.first_level_1_header_end) is not None:
+        return ''.join((file_content[:end], '\n\n', toc, '\n\n---', file_content[end:]))
+    return file_content
+
+
+def __read_md_file(file_path: str) -> Tuple[bytes, str]:
+    # the raw bytes and the content read as text (universal newlines)
+    with open(file_path, mode='rb') as f:
+        raw = f.read()
+    file_content = raw.decode('utf-8')
+    if '\r' in file_content:
+        file_content = file_content.replace('\r\n', '\n').replace('\r', '\n')
+    return raw, file_content
+
+
+def __write_md_file_if_changed(file_path: str, raw: bytes, file_content: str) -> bool:
+    # Skipped when the bytes would stay the same, otherwise written aside and
+    # renamed over `file_path`, so a reader never sees a partial file.
+    new_raw = file_content.encode('utf-8')
+    if new_raw == raw:
+        return False
+    with af.atomic_write(file_path, keep_mode=True) as f:
+        f.write(new_raw)
+    return True
 
 
 def write_toc_to_md_file(
     file_path: str, /, *, given_content_not_path: bool = False, write_to_file: bool = True
 ) -> str:
     if given_content_not_path:
-        file_content = file_path
-        write_to_file = False
-    else:
-        with open(file_path, mode='rt', encoding='utf-8') as f:
-            file_content = f.read()
-
-    toc = gen_md_toc(file_content, include_begin_end_comment=True)
-    # Read literal `text\1{a new line}test` into python will get:
-    # `text\\1\ntest` (`repr` * 1).  To pass this to the `re` module,
-    # we need to escape it again (`repr` * 2), produce `text\\\\1\\ntest`.
-    if __REGEX_EXISTING_TOC.search(file_content) is not None:
-        file_content = __REGEX_EXISTING_TOC.sub(repr(toc)[1:-1], file_content)
-    else:
-        file_content = __REGEX_FIRST_LEVEL_HEADER.sub(
-            r''.join(
-                (
-                    r'\g<flh>\n',
-                    r'\n',
-                    repr(toc)[1:-1],
-                    r'\n',
-                    r'\n---',
-                )
-            ),
-            file_content
-        )
+        return __splice_toc(file_path)
 
+    raw, file_content = __read_md_file(file_path)
+    file_content = __splice_toc(file_content)
     if write_to_file:
-        with open(file_path, mode='wt', encoding='utf-8', newline='\n') as f:
-            f.write(file_content)
-
+        __write_md_file_if_changed(file_path, raw, file_content)
     return file_content
+
+
+@dcs.dataclass
+class TOC_Batch_Report:
+    scanned: int = 0
+    regenerated: int = 0
+    skipped: int = 0
+
+
+TOC_CACHE_VERSION = 2
+
+
+def __write_toc_if_changed(file_path: str) -> Tuple[str, bool, Dict[str, int]]:
+    # runs in the worker processes of `write_toc_to_md_files`, a file whose
+    # TOC is already up to date is not counted as regenerated
+    raw, file_content = __read_md_file(file_path)
+    regenerated = __write_md_file_if_changed(file_path, raw, __splice_toc(file_content))
+    stat = os.stat(file_path)
+    return file_path, regenerated, {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def write_toc_to_md_files(
+    path: Union[str, Iterable[str]],
+    /,
+    *,
+    cache_path: Optional[str] = None,
+    workers: int = 1,
+    suffix: str = '.md',
+) -> TOC_Batch_Report:
+    # `path` is a directory (searched recursively for `suffix` files) or an
+    # iterable of file paths.
+    #
+    # The cache in `cache_path` remembers the mtime and size of every file
+    # from the last run.  A file with the same mtime and size is skipped
+    # without being read, the rest are regenerated (in a process pool of
+    # `workers` processes when `workers` > 1), and only written when their
+    # content changes.
+    if isinstance(path, str):
+        file_path_list = sorted(
+            os.path.join(root, name)
+            for root, _, name_list in os.walk(path)
+            for name in name_list
+            if name.endswith(suffix)
+        )
+    else:
+        file_path_list = list(path)
+
+    cache: Dict[str, Dict[str, int]] = dict()
+    if (cache_path is not None) and os.path.exists(cache_path):
+        with open(cache_path, mode='rt', encoding='utf-8') as f:
+            cache_data = json.load(f)
+        if cache_data.get('version') == TOC_CACHE_VERSION:
+            cache = cache_data['files']
+
+    report = TOC_Batch_Report()
+    pending: List[str] = []
+    for file_path in file_path_list:
+        report.scanned += 1
+        key = os.path.abspath(file_path)
+        entry = cache.get(key)
+        stat = os.stat(file_path)
+        if (
+            (entry is not None)
+            and (entry['mtime_ns'] == stat.st_mtime_ns)
+            and (entry['size'] == stat.st_size)
+        ):
+            report.skipped += 1
+        else:
+            pending.append(key)
+
+    with contextlib.ExitStack() as stack:
+        if (workers > 1) and (len(pending) > 1):
+            executor = stack.enter_context(
+                concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+            )
+            result_iter = executor.map(__write_toc_if_changed, pending)
+        else:
+            result_iter = (__write_toc_if_changed(key) for key in pending)
+        for key, regenerated, entry in result_iter:
+            cache[key] = entry
+            if regenerated:
+                report.regenerated += 1
+            else:
+                report.skipped += 1
+
+    if cache_path is not None:
+        with af.atomic_write(cache_path, mode='wt', encoding='utf-8') as f:
+            json.dump({'version': TOC_CACHE_VERSION, 'files': cache}, f)
+
+    return report
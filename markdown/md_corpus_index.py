@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import bisect
+import dataclasses as dcs
+import datetime as dt
+import json
+import os
+import posixpath
+import urllib.parse
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from tty7tyil_python import atomic_file as af
+from tty7tyil_python.markdown import md_content_operator as mdco
+from tty7tyil_python.markdown import md_structure_data as mdsd
+
+INDEX_VERSION = 1
+
+
+@dcs.dataclass
+class MD_Corpus_Index_Report:
+    scanned: int = 0
+    reindexed: int = 0
+    skipped: int = 0
+    removed: int = 0
+
+
+class MD_Corpus_Index:
+    # File header metadata (`MD_Structure_Data.extract_file_header`) and header
+    # anchors (`md_content_operator.gen_md_anchor`) of every `suffix` file
+    # under `root`, keyed by its path relative to `root` (with '/').
+    #
+    # `update` only reads the files whose mtime or size changed since the last
+    # update, and saves the index to `index_path` if given (loaded again on
+    # construction).  With `anchors` False, only the head of every file is
+    # read, up to the end of its file header.
+    def __init__(
+        self,
+        root: str,
+        /,
+        *,
+        index_path: Optional[str] = None,
+        suffix: str = '.md',
+        anchors: bool = True,
+    ):
+        self.root = root
+        self.index_path = index_path
+        self.suffix = suffix
+        self.anchors = anchors
+        # path -> {'mtime_ns', 'size', 'metadata', 'anchors'}, all json values
+        self.__file_dict: Dict[str, Dict[str, Union[int, dict, list]]] = dict()
+        self.__anchor_set: Optional[Set[str]] = None  # 'path#anchor'
+        self.__time_index: Dict[str, Tuple[List[dt.datetime], List[str]]] = dict()
+        if (index_path is not None) and os.path.exists(index_path):
+            with open(index_path, mode='rt', encoding='utf-8') as f:
+                index_data = json.load(f)
+            if (index_data.get('version') == INDEX_VERSION) and (
+                index_data.get('anchors') == anchors
+            ):
+                self.__file_dict = index_data['files']
+
+    def __len__(self) -> int:
+        return len(self.__file_dict)
+
+    @property
+    def files(self) -> List[str]:
+        return sorted(self.__file_dict)
+
+    def update(self) -> MD_Corpus_Index_Report:
+        report = MD_Corpus_Index_Report()
+        found_set: Set[str] = set()
+        for dir_path, _, name_list in os.walk(self.root):
+            for name in name_list:
+                if not name.endswith(self.suffix):
+                    continue
+                file_path = os.path.join(dir_path, name)
+                key = os.path.relpath(file_path, self.root).replace(os.sep, '/')
+                found_set.add(key)
+                report.scanned += 1
+                stat = os.stat(file_path)
+                entry = self.__file_dict.get(key)
+                if (
+                    (entry is not None)
+                    and (entry['mtime_ns'] == stat.st_mtime_ns)
+                    and (entry['size'] == stat.st_size)
+                ):
+                    report.skipped += 1
+                    continue
+                self.__file_dict[key] = self.__read_entry(file_path, stat)
+                report.reindexed += 1
+        for key in set(self.__file_dict) - found_set:
+            del self.__file_dict[key]
+            report.removed += 1
+
+        if report.reindexed or report.removed:
+            self.__anchor_set = None
+            self.__time_index.clear()
+            if self.index_path is not None:
+                self.save()
+        return report
+
+    def __read_entry(self, file_path: str, stat: os.stat_result) -> Dict:
+        with open(file_path, mode='rt', encoding='utf-8') as f:
+            if self.anchors:
+                md_structure_data = mdsd.MD_Structure_Data(f)
+                file_header = md_structure_data.file_header
+                toc_tree = md_structure_data.compact_toc_tree
+                anchor_list = [
+                    mdco.gen_md_anchor(toc_tree.data[i].content, toc_tree.data[i].serial)
+                    for i in toc_tree.preorder()
+                    if i != 0
+                ]
+            else:
+                file_header = mdsd.MD_Structure_Data.extract_file_header(f)
+                anchor_list = []
+        return {
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'metadata': {
+                k: (
+                    v.isoformat() if isinstance(v, dt.datetime)
+                    else list(v) if isinstance(v, tuple)
+                    else v
+                )
+                for k, v in file_header.items()
+            },
+            'anchors': anchor_list,
+        }
+
+    def save(self):
+        with af.atomic_write(self.index_path, mode='wt', encoding='utf-8') as f:
+            json.dump(
+                {'version': INDEX_VERSION, 'anchors': self.anchors, 'files': self.__file_dict},
+                f,
+                ensure_ascii=False,
+            )
+
+    def metadata(self, path: str) -> Dict[str, Union[dt.datetime, Tuple[str, ...], None]]:
+        # the same values `extract_file_header` gives
+        return {
+            k: (
+                dt.datetime.fromisoformat(v) if 'time' in k and isinstance(v, str)
+                else tuple(v) if isinstance(v, list)
+                else v
+            )
+            for k, v in self.__file_dict[path]['metadata'].items()
+        }
+
+    def anchors_of(self, path: str) -> Tuple[str, ...]:
+        return tuple(self.__file_dict[path]['anchors'])
+
+    def files_modified_after(self, field: str, time: dt.datetime, /) -> List[str]:
+        # Files whose `field` (e.g. 'modify time') is later than `time`, the
+        # earliest first.  The sorted times of every field are built on first
+        # query.
+        if (time_index := self.__time_index.get(field)) is None:
+            pair_list = sorted(
+                (dt.datetime.fromisoformat(value), path)
+                for path, entry in self.__file_dict.items()
+                if isinstance(value := entry['metadata'].get(field), str)
+            )
+            time_index = self.__time_index[field] = (
+                [p[0] for p in pair_list], [p[1] for p in pair_list]
+            )
+        time_list, path_list = time_index
+        return path_list[bisect.bisect_right(time_list, time):]
+
+    def has_link_target(self, target: str, /, source: str = '') -> bool:
+        # `target` is a link as written in the file `source` (a path of the
+        # index): 'other.md', '../dir/other.md#anchor' or '#anchor'
+        if self.__anchor_set is None:
+            self.__anchor_set = {
+                '{}#{}'.format(path, anchor)
+                for path, entry in self.__file_dict.items()
+                for anchor in entry['anchors']
+            }
+        path, _, anchor = urllib.parse.unquote(target).partition('#')
+        if path == '':
+            path = source
+        else:
+            path = posixpath.normpath(posixpath.join(posixpath.dirname(source), path))
+        if anchor == '':
+            return path in self.__file_dict
+        return '{}#{}'.format(path, anchor) in self.__anchor_set
@@ -5,8 +5,9 @@ from __future__ import annotations
 
 import dataclasses as dcs
 import datetime as dt
+import io
 import re
-from typing import Dict, List, Tuple, Union
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 from tty7tyil_python import tree
 
@@ -19,40 +20,181 @@ class MD_Structure_Data:
 
     @dcs.dataclass
     class TOC_Header_Data:
+        __slots__ = ('level_in_file', 'content', 'serial')
+
         level_in_file: int
         content: str
         serial: int
 
-    def __init__(self, md_file_content: str, /):
+    def __init__(self, md_file_content: Union[str, Iterable[str]], /):
+        # `md_file_content` is the whole content, or anything iterating over
+        # its lines (like an opened file), which is then read in one pass
+        file_header_line_list, toc_header_list, splice_offsets = MD_Structure_Data.__scan(
+            md_file_content
+        )
+        # Character offsets in the content, for splicing a TOC into it: where
+        # the first level 1 header line ends (before its newline), and the
+        # span of the TOC placeholder (`TOC_BEGIN_COMMENT` to `TOC_END_COMMENT`
+        # lines), `None` if there is none.  Both outside of fenced code blocks.
+        self.first_level_1_header_end: Optional[int] = splice_offsets[0]
+        self.toc_placeholder_span: Optional[Tuple[int, int]] = splice_offsets[1]
         self.file_header: Dict[
             str, Union[dt.datetime, Tuple[str, ...], None]
-        ] = MD_Structure_Data.extract_file_header(md_file_content)
-        self.toc_tree: tree.Tree[
+        ] = MD_Structure_Data.__interpret_file_header(file_header_line_list)
+        self.__compact_toc_tree: tree.Compact_Tree[
             MD_Structure_Data.TOC_Header_Data
-        ] = MD_Structure_Data.extract_toc(md_file_content)
+        ] = MD_Structure_Data.__build_toc_tree(toc_header_list)
+        self.__toc_tree: Optional[tree.Tree[MD_Structure_Data.TOC_Header_Data]] = None
+
+    @property
+    def toc_tree(self) -> tree.Tree[MD_Structure_Data.TOC_Header_Data]:
+        # built from the parsed headers on first access, from then on it is the
+        # source of truth and can be changed in place
+        if self.__toc_tree is None:
+            self.__toc_tree = self.__compact_toc_tree.to_tree()
+        return self.__toc_tree
+
+    @toc_tree.setter
+    def toc_tree(self, toc_tree: tree.Tree[MD_Structure_Data.TOC_Header_Data]):
+        self.__toc_tree = toc_tree
+
+    @property
+    def compact_toc_tree(self) -> tree.Compact_Tree[MD_Structure_Data.TOC_Header_Data]:
+        # read only, taken from `toc_tree` again on every access once that was
+        # built, so it never misses a change made there
+        if self.__toc_tree is not None:
+            return tree.Compact_Tree.from_tree(self.__toc_tree)
+        return self.__compact_toc_tree
 
     FILE_HEADER_BEGIN_COMMENT = '<!-- metadata header ---'
     FILE_HEADER_END_COMMENT = '---- metadata header -->'
-    __REGEX_FILE_HEADER = re.compile(
-        r'^{fhbc}\n(.+\n)*?{fhec}$'.format(
-            fhbc=repr(FILE_HEADER_BEGIN_COMMENT)[1:-1],
-            fhec=repr(FILE_HEADER_END_COMMENT)[1:-1],
-        ),
-        flags=re.MULTILINE,
-    )
+    # The TOC placeholder is a run of non-blank lines from a
+    # `TOC_BEGIN_COMMENT` line to a `TOC_END_COMMENT` line, with a blank line
+    # before and after it.
+    TOC_BEGIN_COMMENT = '<!-- GMT TOC BEGIN -->'
+    TOC_END_COMMENT = '<!-- GMT TOC END -->'
     __REGEX_FILE_HEADER_DATA_PAIR = re.compile(
         r' *(.+?) *: *(.*?) *$',
         flags=re.MULTILINE,
     )
+    __REGEX_TOC_HEADER = re.compile(
+        r'^(#{1,6}) (.+)$',
+        flags=re.MULTILINE,
+    )
+    __REGEX_CODE_FENCE = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+
+    @staticmethod
+    def __scan(
+        md_file_content: Union[str, Iterable[str]], /, *, file_header_only: bool = False
+    ) -> Tuple[
+        Optional[List[str]],
+        List[Tuple[str, str]],
+        Tuple[Optional[int], Optional[Tuple[int, int]]],
+    ]:
+        # One pass over the lines, gives the lines inside the file header
+        # (`None` if there is none), the `(hashes, content)` of every TOC
+        # header outside of fenced code blocks, and the splice offsets (see
+        # `__init__`).
+        #
+        # The file header is the first run of non-blank lines that begins with a
+        # `FILE_HEADER_BEGIN_COMMENT` line and ends with a
+        # `FILE_HEADER_END_COMMENT` line.
+        if isinstance(md_file_content, str):
+            md_file_content = io.StringIO(md_file_content)
+
+        file_header_line_list: Optional[List[str]] = None
+        pending_file_header_line_list: Optional[List[str]] = None
+        toc_header_list: List[Tuple[str, str]] = []
+        fence: Optional[str] = None
+        offset = 0
+        first_level_1_header_end: Optional[int] = None
+        toc_placeholder_span: Optional[Tuple[int, int]] = None
+        placeholder_start: Optional[int] = None  # of the placeholder being read
+        placeholder_end: Optional[int] = None  # set right after a `TOC_END_COMMENT` line
+        # the line before follows a newline and is blank
+        after_blank_line = False
+        for raw_line in md_file_content:
+            terminated = raw_line[-1:] == '\n'
+            line = raw_line[:-1] if terminated else raw_line
+
+            if file_header_line_list is None:
+                if pending_file_header_line_list is not None:
+                    if line == MD_Structure_Data.FILE_HEADER_END_COMMENT:
+                        file_header_line_list = pending_file_header_line_list
+                        if file_header_only:
+                            break
+                    elif line == '':
+                        pending_file_header_line_list = None
+                    else:
+                        pending_file_header_line_list.append(line)
+                elif line == MD_Structure_Data.FILE_HEADER_BEGIN_COMMENT:
+                    pending_file_header_line_list = []
+            if file_header_only:
+                continue
+            line_start = offset
+            offset += len(raw_line)
+
+            if toc_placeholder_span is not None:
+                pass
+            elif placeholder_start is not None:
+                if (placeholder_end is not None) and (line == '') and terminated:
+                    toc_placeholder_span = (placeholder_start, placeholder_end)
+                elif (line == '') or not terminated:
+                    placeholder_start = None
+                elif line == MD_Structure_Data.TOC_END_COMMENT:
+                    placeholder_end = line_start + len(line)
+                else:
+                    placeholder_end = None  # the end comment was not the end
+            elif (
+                (fence is None)
+                and after_blank_line
+                and terminated
+                and (line == MD_Structure_Data.TOC_BEGIN_COMMENT)
+            ):
+                placeholder_start, placeholder_end = line_start, None
+            after_blank_line = (line == '') and terminated and (0 < line_start)
+
+            m = MD_Structure_Data.__REGEX_CODE_FENCE.match(line)
+            if fence is None:
+                if m is not None:
+                    fence = m.group(1)
+                elif (m := MD_Structure_Data.__REGEX_TOC_HEADER.match(line)) is not None:
+                    toc_header_list.append((m.group(1), m.group(2)))
+                    if (first_level_1_header_end is None) and (m.group(1) == '#'):
+                        first_level_1_header_end = line_start + len(line)
+            elif (
+                (m is not None)
+                and (m.group(1)[0] == fence[0])
+                and (len(fence) <= len(m.group(1)))
+                and (line[m.end():].strip() == '')
+            ):
+                fence = None
+
+        return (
+            file_header_line_list,
+            toc_header_list,
+            (first_level_1_header_end, toc_placeholder_span),
+        )
 
     @staticmethod
     def extract_file_header(
-        md_file_content: str,
+        md_file_content: Union[str, Iterable[str]],
     ) -> Dict[str, Union[dt.datetime, Tuple[str, ...], None]]:
-        if (m := MD_Structure_Data.__REGEX_FILE_HEADER.search(md_file_content)) is not None:
-            raw_data_pair_list = MD_Structure_Data.__REGEX_FILE_HEADER_DATA_PAIR.findall(
-                md_file_content[m.start():m.end()]
-            )
+        # stops reading right after the file header
+        return MD_Structure_Data.__interpret_file_header(
+            MD_Structure_Data.__scan(md_file_content, file_header_only=True)[0]
+        )
+
+    @staticmethod
+    def __interpret_file_header(
+        file_header_line_list: Optional[List[str]],
+    ) -> Dict[str, Union[dt.datetime, Tuple[str, ...], None]]:
+        if file_header_line_list is not None:
+            raw_data_pair_list = [
+                p
+                for line in file_header_line_list
+                for p in MD_Structure_Data.__REGEX_FILE_HEADER_DATA_PAIR.findall(line)
+            ]
             data_pair_dict: Dict[str, Union[dt.datetime, Tuple[str, ...], None]] = dict()
             for p in raw_data_pair_list:
                 if 'time' in p[0]:
@@ -89,56 +231,43 @@ class MD_Structure_Data:
         else:
             return dict()
 
-    __REGEX_TOC_HEADER = re.compile(
-        r'^(#{1,6}) (.+)$',
-        flags=re.MULTILINE,
-    )
-
     @staticmethod
-    def extract_toc(md_file_content: str) -> tree.Tree[MD_Structure_Data.TOC_Header_Data]:
-        raw_toc_list = MD_Structure_Data.__REGEX_TOC_HEADER.findall(md_file_content)
-        toc_header_data_list = []
-
-        serial_dict: Dict[str, int] = {}
-        # initialize the serial to 0 for every toc content
-        for e in raw_toc_list:
-            serial_dict[e[1]] = 0
-        # fill the list while counting serial
-        for e in raw_toc_list:
-            toc_header_data_list.append(
-                MD_Structure_Data.TOC_Header_Data(len(e[0]), e[1], serial_dict[e[1]])
-            )
-            serial_dict[e[1]] += 1
-
-        return MD_Structure_Data.__fill_toc_tree(
-            tree.Tree(MD_Structure_Data.TOC_Header_Data(0, 'Table of Contents', 0)),
-            toc_header_data_list,
-        )[0]
+    def extract_toc(
+        md_file_content: Union[str, Iterable[str]],
+    ) -> tree.Tree[MD_Structure_Data.TOC_Header_Data]:
+        return MD_Structure_Data.__build_toc_tree(
+            MD_Structure_Data.__scan(md_file_content)[1]
+        ).to_tree()
 
     @staticmethod
-    def __fill_toc_tree(
-        toc_tree: tree.Tree[MD_Structure_Data.TOC_Header_Data],
-        toc_header_data_list: List[MD_Structure_Data.TOC_Header_Data],
-        /,
-        start_index: int = 0,
-    ) -> Tuple[tree.Tree[MD_Structure_Data.TOC_Header_Data], int]:
-        toc_level = toc_header_data_list[start_index].level_in_file
-        i = start_index
-        while True:
-            if i == len(toc_header_data_list):
-                return toc_tree, i
-            elif toc_header_data_list[i].level_in_file == toc_level:
-                toc_tree.branches.append(tree.Tree(toc_header_data_list[i]))
-                i += 1
-            elif toc_level < toc_header_data_list[i].level_in_file:
-                sub_tree, i = MD_Structure_Data.__fill_toc_tree(
-                    toc_tree.branches[-1],
-                    toc_header_data_list,
-                    i
+    def __build_toc_tree(
+        raw_toc_list: List[Tuple[str, str]],
+    ) -> tree.Compact_Tree[MD_Structure_Data.TOC_Header_Data]:
+        # Single pass with an explicit stack of the open ancestors: every header
+        # becomes a branch of the nearest ancestor shallower than itself, so a
+        # header shallower than the first one simply goes back up to the root.
+        toc_tree = tree.Compact_Tree(MD_Structure_Data.TOC_Header_Data(0, 'Table of Contents', 0))
+        stack = [(0, 0)]  # (level, index)
+        serial_dict: Dict[str, int] = {}
+        for hashes, content in raw_toc_list:
+            serial = serial_dict.get(content, 0)
+            serial_dict[content] = serial + 1
+            level = len(hashes)
+            while level <= stack[-1][0]:
+                stack.pop()
+            stack.append(
+                (
+                    level,
+                    toc_tree.append(
+                        stack[-1][1], MD_Structure_Data.TOC_Header_Data(level, content, serial)
+                    ),
                 )
-                toc_tree.branches[-1] = sub_tree
-            else:
-                return toc_tree, i
+            )
+        return toc_tree
 
     def titles(self) -> Tuple[str, ...]:
-        return tuple(e.data.content for e in self.toc_tree.branches)
+        if self.__toc_tree is not None:
+            return tuple(e.data.content for e in self.__toc_tree.branches)
+        return tuple(
+            self.__compact_toc_tree.data[i].content for i in self.__compact_toc_tree.branches(0)
+        )
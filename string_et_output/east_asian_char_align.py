@@ -1,25 +1,80 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import functools
 import unicodedata as ucd
-from typing import Tuple
+from typing import Iterable, List, Tuple
 
 # Details about Unicode East Asian Width can be found at:
 # [UAX #11: East Asian Width](https://www.unicode.org/reports/tr11/tr11-36.html)
 
 
+class __Width_Table(dict):
+    # A `str.translate` table mapping every code point to itself repeated by
+    # its visual width (dropped when zero width), so the visual length of a
+    # string is the length of its translation.  Every code point is looked up
+    # in `unicodedata` only once, on first sight.
+    def __init__(self, wide: str, resolve_as_wide: Tuple[str, ...], zero_width_combining: bool):
+        super().__init__()
+        self.wide = wide
+        self.resolve_as_wide = resolve_as_wide
+        self.zero_width_combining = zero_width_combining
+        self.ascii_narrow = all(len(chr(i).translate(self)) == 1 for i in range(0x80))
+
+    def __missing__(self, code_point: int) -> str:
+        c = chr(code_point)
+        t = ucd.east_asian_width(c)
+        if self.zero_width_combining and (
+            (ucd.combining(c) != 0) or (ucd.category(c) in ('Mn', 'Me', 'Cf'))
+        ):
+            value = ''
+        elif (t in self.wide) or (t in self.resolve_as_wide):
+            value = c * 2
+        else:
+            value = c
+        self[code_point] = value
+        return value
+
+
+@functools.lru_cache(maxsize=None)
+def __get_width_table(
+    ambiguous_always_wide: bool,
+    resolve_as_wide: Tuple[str, ...],
+    zero_width_combining: bool,
+) -> __Width_Table:
+    return __Width_Table(
+        'FWA' if ambiguous_always_wide else 'FW', resolve_as_wide, zero_width_combining
+    )
+
+
 def count_visual_length(
     string: str,
     ambiguous_always_wide: bool = False,
     resolve_as_wide: Tuple[str, ...] = (),
+    *,
+    zero_width_combining: bool = False,
 ) -> int:
-    wide = 'FWA' if ambiguous_always_wide else 'FW'
-    visual_length = len(string)
-    for c in string:
-        t = ucd.east_asian_width(c)
-        if (t in wide) or (t in resolve_as_wide):
-            visual_length += 1
-    return visual_length
+    # `zero_width_combining` counts combining marks and format characters
+    # (categories Mn, Me and Cf) as zero width instead of as narrow
+    table = __get_width_table(ambiguous_always_wide, tuple(resolve_as_wide), zero_width_combining)
+    if table.ascii_narrow and string.isascii():
+        return len(string)
+    return len(string.translate(table))
+
+
+def count_visual_lengths(
+    string_iter: Iterable[str],
+    ambiguous_always_wide: bool = False,
+    resolve_as_wide: Tuple[str, ...] = (),
+    *,
+    zero_width_combining: bool = False,
+) -> List[int]:
+    table = __get_width_table(ambiguous_always_wide, tuple(resolve_as_wide), zero_width_combining)
+    ascii_narrow = table.ascii_narrow
+    return [
+        len(string) if (ascii_narrow and string.isascii()) else len(string.translate(table))
+        for string in string_iter
+    ]
 
 
 def align_to_width(
@@ -30,6 +85,7 @@ def align_to_width(
     *,
     ambiguous_always_wide: bool = False,
     resolve_as_wide: Tuple[str, ...] = (),
+    zero_width_combining: bool = False,
 ) -> str:
     return '{string:{fill}{align}{width}}'.format(
         fill=fill,
@@ -41,6 +97,7 @@ def align_to_width(
                     string,
                     ambiguous_always_wide,
                     resolve_as_wide,
+                    zero_width_combining=zero_width_combining,
                 )
                 - len(string)
             )
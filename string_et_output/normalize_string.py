@@ -2,8 +2,9 @@
 # -*- coding: utf-8 -*-
 
 import enum
+import functools
 import re
-from typing import Callable, Sequence, Tuple
+from typing import Callable, Iterable, List, Sequence, Tuple
 
 # how to convert to markdown anchor (reference: https://gist.github.com/asabaylus/3071099)
 # 1. to lower case (1)
@@ -36,24 +37,60 @@ def normalize_string(
     *,
     valid_char: Sequence[str] = MD_ANCHOR_VALID_CHAR,
 ) -> str:
+    return get_normalizer(style, case_converter, valid_char=valid_char)(raw_string)
+
+
+def normalize_many(
+    raw_string_iter: Iterable[str],
+    /,
+    style: NORMALIZATION_STYLE = NORMALIZATION_STYLE.MARKDOWN,
+    case_converter: Callable[[str], str] = str.lower,
+    *,
+    valid_char: Sequence[str] = MD_ANCHOR_VALID_CHAR,
+) -> List[str]:
+    normalizer = get_normalizer(style, case_converter, valid_char=valid_char)
+    return [normalizer(s) for s in raw_string_iter]
+
+
+def get_normalizer(
+    style: NORMALIZATION_STYLE = NORMALIZATION_STYLE.MARKDOWN,
+    case_converter: Callable[[str], str] = str.lower,
+    *,
+    valid_char: Sequence[str] = MD_ANCHOR_VALID_CHAR,
+) -> Callable[[str], str]:
+    # The pattern is compiled once for every `style` and `valid_char`, and
+    # reused after.  `case_converter` is not part of the cache key, so a fresh
+    # lambda on every call does not grow the cache.
+    remove_others = __build_remover(style, tuple(valid_char))
+
+    def normalizer(raw_string: str, /) -> str:
+        # convert capitalization last
+        return case_converter(remove_others(raw_string))
+
+    return normalizer
+
+
+@functools.lru_cache(maxsize=None)
+def __build_remover(
+    style: NORMALIZATION_STYLE,
+    valid_char: Tuple[str, ...],
+) -> Callable[[str], str]:
     # replace space
     if style in (NORMALIZATION_STYLE.MARKDOWN, NORMALIZATION_STYLE.HYPHEN):
-        string = raw_string.replace(' ', '-')
+        space_replacement = '-'
     elif style is NORMALIZATION_STYLE.UNDERSCORE:
-        string = raw_string.replace(' ', '_')
+        space_replacement = '_'
     elif style is NORMALIZATION_STYLE.DOT:
-        string = raw_string.replace(' ', '.')
+        space_replacement = '.'
     else:  # !!! THIS SHOULD NEVER EVER HAPPEN !!!
-        string = raw_string
+        space_replacement = ' '
 
     # remove others
     if (style is not NORMALIZATION_STYLE.MARKDOWN) and (r'\.' not in valid_char):
-        valid_char = list(valid_char)
-        valid_char.append(r'\.')
-    regex_char_to_remove = re.compile(r'[^{}]'.format(''.join(valid_char)), flags=re.ASCII)
-    string = regex_char_to_remove.sub('', string)
+        valid_char = (*valid_char, r'\.')
+    remove_char = re.compile(r'[^{}]'.format(''.join(valid_char)), flags=re.ASCII).sub
 
-    # convert capitalization
-    string = case_converter(string)
+    def remove_others(raw_string: str, /) -> str:
+        return remove_char('', raw_string.replace(' ', space_replacement))
 
-    return string
+    return remove_others
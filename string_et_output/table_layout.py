@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+
+from tty7tyil_python.string_et_output import east_asian_char_align as eaca
+
+# Rows of cells padded to the visual width of their column, the same way
+# `align_to_width` pads a single string, but with every cell measured exactly
+# once.  `align` is one of '<', '>' and '^' for every column, or a sequence of
+# them (like '<>^') with one per column; a cell wider than its column is left
+# as it is.  Missing cells at the end of a row are empty.
+
+
+def __pad(string: str, visual_length: int, width: int, fill: str, align: str) -> str:
+    pad = width - visual_length
+    if pad <= 0:
+        return string
+    if align == '<':
+        return string + fill * pad
+    if align == '>':
+        return fill * pad + string
+    # centered like `str.format`, the extra fill goes to the right
+    return ''.join((fill * (pad // 2), string, fill * (pad - pad // 2)))
+
+
+def __write_row(
+    write: Callable[[str], Any],
+    row: Sequence[str],
+    length_list: Sequence[int],
+    width_list: Sequence[int],
+    fill: str,
+    align_list: Sequence[str],
+    column_separator: str,
+    line_end: str,
+):
+    write(
+        column_separator.join(
+            [
+                __pad(row[i] if i < len(row) else '', length_list[i], width, fill, align_list[i])
+                for i, width in enumerate(width_list)
+            ]
+        )
+        + line_end
+    )
+
+
+def __align_list(align: Sequence[str], column_count: int) -> Sequence[str]:
+    if len(align) == 1:
+        return align * column_count
+    if len(align) < column_count:
+        raise ValueError('{} alignments for {} columns'.format(len(align), column_count))
+    return align
+
+
+def write_table(
+    row_list: Sequence[Sequence[str]],
+    write: Callable[[str], Any],
+    /,
+    *,
+    align: Sequence[str] = '<',
+    fill: str = ' ',
+    column_separator: str = ' ',
+    line_end: str = '\n',
+    ambiguous_always_wide: bool = False,
+    resolve_as_wide: Tuple[str, ...] = (),
+    zero_width_combining: bool = False,
+) -> List[int]:
+    # Two passes over `row_list`: the first measures every cell (in one
+    # `count_visual_lengths` call) to find the column widths, the second pads
+    # and writes every row with `write`, like `sys.stdout.write`.  Gives the
+    # column widths.
+    column_count = max((len(row) for row in row_list), default=0)
+    flat_length_list = eaca.count_visual_lengths(
+        (cell for row in row_list for cell in row),
+        ambiguous_always_wide,
+        resolve_as_wide,
+        zero_width_combining=zero_width_combining,
+    )
+    length_list_list = []
+    width_list = [0] * column_count
+    offset = 0
+    for row in row_list:
+        length_list = flat_length_list[offset:offset + len(row)]
+        offset += len(row)
+        length_list.extend([0] * (column_count - len(row)))
+        length_list_list.append(length_list)
+        for i, length in enumerate(length_list):
+            if width_list[i] < length:
+                width_list[i] = length
+
+    align_list = __align_list(align, column_count)
+    for row, length_list in zip(row_list, length_list_list):
+        __write_row(
+            write, row, length_list, width_list, fill, align_list, column_separator, line_end
+        )
+    return width_list
+
+
+def write_table_streaming(
+    row_iter: Iterable[Sequence[str]],
+    write: Callable[[str], Any],
+    width_list: Sequence[int],
+    /,
+    *,
+    align: Sequence[str] = '<',
+    fill: str = ' ',
+    column_separator: str = ' ',
+    line_end: str = '\n',
+    ambiguous_always_wide: bool = False,
+    resolve_as_wide: Tuple[str, ...] = (),
+    zero_width_combining: bool = False,
+) -> int:
+    # Single pass with the given column widths, so `row_iter` can be
+    # unbounded: every row is written as soon as it is read.  Cells past
+    # `len(width_list)` are dropped.  Gives the number of rows written.
+    column_count = len(width_list)
+    align_list = __align_list(align, column_count)
+    row_count = 0
+    for row in row_iter:
+        row = row[:column_count]
+        length_list = eaca.count_visual_lengths(
+            row, ambiguous_always_wide, resolve_as_wide, zero_width_combining=zero_width_combining
+        )
+        length_list.extend([0] * (column_count - len(row)))
+        __write_row(
+            write, row, length_list, width_list, fill, align_list, column_separator, line_end
+        )
+        row_count += 1
+    return row_count
+
+
+def format_table(
+    row_list: Sequence[Sequence[str]],
+    /,
+    *,
+    width_list: Optional[Sequence[int]] = None,
+    **kwargs,
+) -> str:
+    # `write_table` (or `write_table_streaming` with `width_list`) into a string
+    chunk_list: List[str] = []
+    if width_list is None:
+        write_table(row_list, chunk_list.append, **kwargs)
+    else:
+        write_table_streaming(row_list, chunk_list.append, width_list, **kwargs)
+    return ''.join(chunk_list)
@@ -3,7 +3,9 @@
 
 from __future__ import annotations
 
-from typing import Callable, Generic, List, Sequence, TypeVar
+import array
+import collections
+from typing import Callable, Generic, Iterator, List, Optional, Sequence, TextIO, Tuple, TypeVar
 
 TreeDT = TypeVar('TreeDT')
 
@@ -30,32 +32,162 @@ class Tree(Generic[TreeDT]):
         indentation_char: str = ' ',
         indentation: int = 3,
     ) -> str:
-        output = '{prefix}{branch}{leading} {content}\n'.format(
-            prefix=indentation_prefix,
-            branch=branch_char,
-            leading=branch_leading_char * (indentation - 2),
-            content=content_parser(tree.data),
+        return ''.join(
+            Tree.iter_format_lines(
+                tree,
+                indentation_prefix,
+                last,
+                content_parser=content_parser,
+                trunk_char=trunk_char,
+                branch_char=branch_char,
+                branch_leading_char=branch_leading_char,
+                indentation_char=indentation_char,
+                indentation=indentation,
+            )
         )
-        branches_content_list = []
-        for i in range(len(tree.branches)):
-            branches_content_list.append(
-                Tree.format_as_string(
-                    tree.branches[i],
-                    (
-                        indentation_prefix
-                        + (
-                            (indentation_char * indentation)
-                            if last is True
-                            else (trunk_char + indentation_char * (indentation - 1))
-                        )
-                    ),
-                    True if i == len(tree.branches) - 1 else False,
-                    content_parser=content_parser,
-                    trunk_char=trunk_char,
-                    branch_char=branch_char,
-                    branch_leading_char=branch_leading_char,
-                    indentation_char=indentation_char,
-                    indentation=indentation,
+
+    @staticmethod
+    def write_formatted(
+        tree: Tree[TreeDT],
+        stream: TextIO,
+        /,
+        indentation_prefix: str = '',
+        last: bool = True,
+        **kwargs,
+    ):
+        # `kwargs` are the keyword only options of `format_as_string`
+        stream.writelines(Tree.iter_format_lines(tree, indentation_prefix, last, **kwargs))
+
+    @staticmethod
+    def iter_format_lines(
+        tree: Tree[TreeDT],
+        /,
+        indentation_prefix: str = '',
+        last: bool = True,
+        *,
+        content_parser: Callable[[TreeDT], str] = str,
+        trunk_char: str = '|',
+        branch_char: str = '+',
+        branch_leading_char: str = '-',
+        indentation_char: str = ' ',
+        indentation: int = 3,
+    ) -> Iterator[str]:
+        # Lines of `format_as_string` one by one (each ends with '\n'), walking
+        # the tree with an explicit stack, so the time is linear in the output
+        # size and the depth is not limited by the recursion limit.
+        leading = branch_leading_char * (indentation - 2)
+        last_padding = indentation_char * indentation
+        trunk_padding = trunk_char + indentation_char * (indentation - 1)
+        stack: List[Tuple[Tree[TreeDT], str, bool]] = [(tree, indentation_prefix, last)]
+        while stack:
+            node, prefix, node_last = stack.pop()
+            yield '{prefix}{branch}{leading} {content}\n'.format(
+                prefix=prefix,
+                branch=branch_char,
+                leading=leading,
+                content=content_parser(node.data),
+            )
+            if node.branches:
+                branch_prefix = prefix + (last_padding if node_last is True else trunk_padding)
+                stack.extend(
+                    (node.branches[i], branch_prefix, i == len(node.branches) - 1)
+                    for i in range(len(node.branches) - 1, -1, -1)
                 )
+
+
+class Compact_Tree(Generic[TreeDT]):
+    # The same shape as `Tree`, but stored as parallel arrays indexed by node
+    # (the root is node 0): `parent`, `first_child` and `next_sibling` hold
+    # node indices (-1 for none) and `data` holds the payloads.  Traversals
+    # follow the links directly, without a Python object per node or a stack.
+    __slots__ = ('parent', 'first_child', 'next_sibling', 'data', '__last_child')
+
+    def __init__(self, root_data: TreeDT):
+        self.parent = array.array('q', (-1,))
+        self.first_child = array.array('q', (-1,))
+        self.next_sibling = array.array('q', (-1,))
+        self.data: List[TreeDT] = [root_data]
+        self.__last_child = array.array('q', (-1,))  # only used by `append`
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def append(self, parent: int, data: TreeDT) -> int:
+        # adds `data` as the last branch of `parent`, gives the new index
+        index = len(self.data)
+        self.parent.append(parent)
+        self.first_child.append(-1)
+        self.next_sibling.append(-1)
+        self.__last_child.append(-1)
+        self.data.append(data)
+        if (last := self.__last_child[parent]) == -1:
+            self.first_child[parent] = index
+        else:
+            self.next_sibling[last] = index
+        self.__last_child[parent] = index
+        return index
+
+    def branches(self, index: int = 0) -> Iterator[int]:
+        i = self.first_child[index]
+        while i != -1:
+            yield i
+            i = self.next_sibling[i]
+
+    def preorder(self, index: int = 0) -> Iterator[int]:
+        i = index
+        while True:
+            yield i
+            if self.first_child[i] != -1:
+                i = self.first_child[i]
+                continue
+            while (i != index) and (self.next_sibling[i] == -1):
+                i = self.parent[i]
+            if i == index:
+                return
+            i = self.next_sibling[i]
+
+    def postorder(self, index: int = 0) -> Iterator[int]:
+        i = index
+        while True:
+            while self.first_child[i] != -1:
+                i = self.first_child[i]
+            yield i
+            while (i != index) and (self.next_sibling[i] == -1):
+                i = self.parent[i]
+                yield i
+            if i == index:
+                return
+            i = self.next_sibling[i]
+
+    def bfs(self, index: int = 0) -> Iterator[int]:
+        queue = collections.deque((index,))
+        while queue:
+            i = queue.popleft()
+            yield i
+            queue.extend(self.branches(i))
+
+    def path_to_root(self, index: int) -> Iterator[int]:
+        # `index` first, the root last
+        while index != -1:
+            yield index
+            index = self.parent[index]
+
+    @staticmethod
+    def from_tree(tree: Tree[TreeDT]) -> Compact_Tree[TreeDT]:
+        compact_tree = Compact_Tree(tree.data)
+        stack: List[Tuple[Tree[TreeDT], int]] = [(tree, 0)]
+        while stack:
+            node, index = stack.pop()
+            # appended in order, visited in reverse, the shape is the same
+            stack.extend(
+                reversed([(b, compact_tree.append(index, b.data)) for b in node.branches])
             )
-        return ''.join((output, *branches_content_list))
+        return compact_tree
+
+    def to_tree(self, index: int = 0) -> Tree[TreeDT]:
+        node_list: List[Optional[Tree[TreeDT]]] = [None] * len(self.data)
+        for i in self.preorder(index):
+            node_list[i] = Tree(self.data[i])
+            if i != index:
+                node_list[self.parent[i]].branches.append(node_list[i])
+        return node_list[index]
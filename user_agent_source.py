@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import threading
+from typing import List, Optional
+
+# A user agent source is any object with a `random` attribute that gives a user
+# agent string, just like `fake_useragent.UserAgent`.  One source is shared by
+# every crawler session of the process, it is created on first use (not on
+# import or session construction) and can be replaced with
+# `set_user_agent_source`.
+
+USER_AGENT_LIST_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'user_agent_list.json'
+)
+
+
+class Local_User_Agent_Source(object):
+    # Reads the versioned list in `path` (`USER_AGENT_LIST_FILE` by default)
+    # once, on first access.
+    def __init__(self, path: str = USER_AGENT_LIST_FILE):
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__version: Optional[str] = None
+        self.__user_agent_list: Optional[List[str]] = None
+
+    def __load(self) -> List[str]:
+        if self.__user_agent_list is None:
+            with self.__lock:
+                if self.__user_agent_list is None:
+                    with open(self.path, mode='rt', encoding='utf-8') as f:
+                        data = json.load(f)
+                    if len(data['user_agents']) == 0:
+                        raise ValueError('no user agent in {}'.format(self.path))
+                    self.__version = data['version']
+                    self.__user_agent_list = list(data['user_agents'])
+        return self.__user_agent_list
+
+    @property
+    def version(self) -> str:
+        self.__load()
+        return self.__version
+
+    @property
+    def user_agent_list(self) -> List[str]:
+        return list(self.__load())
+
+    @property
+    def random(self) -> str:
+        return random.choice(self.__load())
+
+
+class Fake_User_Agent_Source(object):
+    # `fake_useragent.UserAgent`, imported and built on first access
+    def __init__(self, **kwargs):
+        self.__kwargs = kwargs
+        self.__lock = threading.Lock()
+        self.__fua = None
+
+    @property
+    def random(self) -> str:
+        if self.__fua is None:
+            with self.__lock:
+                if self.__fua is None:
+                    import fake_useragent as fua
+
+                    self.__fua = fua.UserAgent(**self.__kwargs)
+        return self.__fua.random
+
+
+__source = None
+__source_lock = threading.Lock()
+
+
+def get_user_agent_source():
+    global __source
+    if __source is None:
+        with __source_lock:
+            if __source is None:
+                __source = Local_User_Agent_Source()
+    return __source
+
+
+def set_user_agent_source(source):
+    global __source
+    with __source_lock:
+        __source = source